@@ -0,0 +1,13 @@
+-- Realtime for applications: lets the worker react to new 'sending'/'approved'
+-- rows immediately instead of waiting for the next poll.
+-- The frontend already subscribes to this table; this makes it explicit.
+
+DO $$
+BEGIN
+  IF NOT EXISTS (
+    SELECT 1 FROM pg_publication_tables
+    WHERE pubname = 'supabase_realtime' AND schemaname = 'public' AND tablename = 'applications'
+  ) THEN
+    ALTER PUBLICATION supabase_realtime ADD TABLE applications;
+  END IF;
+END $$;
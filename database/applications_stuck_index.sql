@@ -0,0 +1,7 @@
+-- Index for the worker's stuck-application cleanup
+-- (status = 'sending' AND updated_at < now() - STUCK_TIMEOUT_MINUTES)
+-- Keeps each cleanup run proportional to the number of in-flight rows, not the table size.
+
+CREATE INDEX IF NOT EXISTS idx_applications_stuck
+  ON applications (status, updated_at)
+  WHERE status IN ('sending', 'manual_review');
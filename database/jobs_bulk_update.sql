@@ -0,0 +1,32 @@
+-- Bulk job update for the URL extractor daemon: one round-trip per poll
+-- instead of one PATCH per job.
+-- p_rows is a JSON array of {"id": ..., "application_form_type": ..., "has_enkel_soknad": ..., "external_apply_url": ...};
+-- a column is only touched when its key is present in the row object
+-- (so "external_apply_url": null clears it, a missing key keeps it).
+
+CREATE OR REPLACE FUNCTION bulk_update_jobs(p_rows jsonb)
+RETURNS integer
+LANGUAGE sql
+AS $$
+  WITH src AS (
+    SELECT (r->>'id')::uuid AS id, r
+    FROM jsonb_array_elements(p_rows) AS r
+  ),
+  upd AS (
+    UPDATE jobs j SET
+      application_form_type = CASE WHEN src.r ? 'application_form_type'
+        THEN src.r->>'application_form_type' ELSE j.application_form_type END,
+      has_enkel_soknad = CASE WHEN src.r ? 'has_enkel_soknad'
+        THEN (src.r->>'has_enkel_soknad')::boolean ELSE j.has_enkel_soknad END,
+      external_apply_url = CASE WHEN src.r ? 'external_apply_url'
+        THEN src.r->>'external_apply_url' ELSE j.external_apply_url END
+    FROM src
+    WHERE j.id = src.id
+    RETURNING j.id
+  )
+  SELECT count(*)::integer FROM upd;
+$$;
+
+-- Worker-only: the daemon calls this with the service key
+REVOKE EXECUTE ON FUNCTION bulk_update_jobs(jsonb) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION bulk_update_jobs(jsonb) TO service_role;
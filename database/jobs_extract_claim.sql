@@ -0,0 +1,82 @@
+-- URL extractor claim: fetch and claim the daemon's jobs in one round-trip
+-- so several extractor daemons never pick up the same job.
+-- Run this migration after add_application_form_type.sql and add_enkel_soknad_column.sql
+
+-- 1. Claim timestamp (a claim older than p_stale_minutes is considered abandoned)
+ALTER TABLE jobs ADD COLUMN IF NOT EXISTS extract_claimed_at timestamptz;
+
+-- 2. Atomic claim function (SKIP LOCKED, same pattern as claim_applications)
+--    - FINN jobs not detected as Enkel søknad and without a finn.no/job/apply URL
+--    - non-FINN jobs without external_apply_url
+--    Same candidate set as the old PostgREST queries: application_form_type must
+--    be set and not 'finn_easy' (NULL rows were never picked up), and non-FINN
+--    jobs need has_enkel_soknad = false. On top of that, settled or given-up
+--    form types (external_form, external_registration, email, nav_direct,
+--    skyvern_failed) are skipped instead of being re-opened on every poll.
+--    p_since defaults to the daemon's 30-day window, evaluated by Postgres per call.
+CREATE OR REPLACE FUNCTION claim_jobs_for_extraction(
+  p_since timestamptz DEFAULT now() - interval '30 days',
+  p_finn_limit integer DEFAULT 6,
+  p_other_limit integer DEFAULT 5,
+  p_stale_minutes integer DEFAULT 15
+)
+RETURNS TABLE(
+  id uuid,
+  title text,
+  job_url text,
+  source text,
+  has_enkel_soknad boolean,
+  application_form_type text,
+  external_apply_url text
+)
+LANGUAGE sql
+AS $$
+  WITH finn AS (
+    SELECT id FROM jobs
+    WHERE job_url ILIKE '%finn.no%'
+      AND has_enkel_soknad IS NOT TRUE
+      AND application_form_type IS NOT NULL
+      AND application_form_type NOT IN
+          ('finn_easy', 'external_form', 'external_registration', 'email', 'nav_direct', 'skyvern_failed')
+      AND (external_apply_url IS NULL OR external_apply_url NOT LIKE '%finn.no/job/apply%')
+      AND created_at >= p_since
+      AND (extract_claimed_at IS NULL
+           OR extract_claimed_at < now() - (p_stale_minutes || ' minutes')::interval)
+    ORDER BY created_at DESC
+    LIMIT p_finn_limit
+    FOR UPDATE SKIP LOCKED
+  ),
+  other AS (
+    SELECT id FROM jobs
+    WHERE job_url NOT ILIKE '%finn.no%'
+      AND external_apply_url IS NULL
+      AND has_enkel_soknad = false
+      AND application_form_type IS NOT NULL
+      AND application_form_type NOT IN
+          ('finn_easy', 'external_form', 'external_registration', 'email', 'nav_direct', 'skyvern_failed')
+      AND created_at >= p_since
+      AND (extract_claimed_at IS NULL
+           OR extract_claimed_at < now() - (p_stale_minutes || ' minutes')::interval)
+    ORDER BY created_at DESC
+    LIMIT p_other_limit
+    FOR UPDATE SKIP LOCKED
+  )
+  UPDATE jobs j
+  SET extract_claimed_at = now()
+  WHERE j.id IN (SELECT finn.id FROM finn UNION ALL SELECT other.id FROM other)
+  RETURNING j.id, j.title, j.job_url, j.source, j.has_enkel_soknad,
+            j.application_form_type, j.external_apply_url;
+$$;
+
+-- 3. Partial index over the still-open jobs the claim scans (newest first).
+--    The predicate repeats the claim's form-type filter verbatim so the planner
+--    can use it; settled jobs drop out of the index.
+CREATE INDEX IF NOT EXISTS idx_jobs_extract_open
+  ON jobs (created_at DESC)
+  WHERE application_form_type IS NOT NULL
+    AND application_form_type NOT IN
+        ('finn_easy', 'external_form', 'external_registration', 'email', 'nav_direct', 'skyvern_failed');
+
+-- 4. Only the worker (service_role) may claim jobs
+REVOKE EXECUTE ON FUNCTION claim_jobs_for_extraction(timestamptz, integer, integer, integer) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION claim_jobs_for_extraction(timestamptz, integer, integer, integer) TO service_role;
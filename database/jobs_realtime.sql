@@ -0,0 +1,13 @@
+-- Realtime for jobs: lets the URL extractor daemon react to newly inserted
+-- jobs immediately instead of waiting for the next poll.
+-- The frontend already subscribes to this table; this makes it explicit.
+
+DO $$
+BEGIN
+  IF NOT EXISTS (
+    SELECT 1 FROM pg_publication_tables
+    WHERE pubname = 'supabase_realtime' AND schemaname = 'public' AND tablename = 'jobs'
+  ) THEN
+    ALTER PUBLICATION supabase_realtime ADD TABLE jobs;
+  END IF;
+END $$;
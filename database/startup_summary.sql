@@ -0,0 +1,46 @@
+-- Startup summary: the worker's per-user summary in a single round-trip
+-- (email, hot jobs, today's FINN Easy jobs without a sent/sending application).
+-- Run this migration after worker_heartbeat.sql
+
+-- Earlier helpers (also SECURITY DEFINER and executable by PUBLIC, one of them
+-- exposing auth.users emails): dropped here rather than re-granted
+DROP FUNCTION IF EXISTS get_job_summary_by_user(timestamptz);
+DROP FUNCTION IF EXISTS get_user_emails_bulk(uuid[]);
+
+CREATE OR REPLACE FUNCTION get_startup_summary(p_since timestamptz)
+RETURNS TABLE(user_id uuid, email text, hot_count bigint, ready_finn bigint)
+LANGUAGE sql SECURITY DEFINER
+AS $$
+  WITH hot AS (
+    SELECT j.user_id, count(*) AS cnt
+    FROM jobs j
+    WHERE j.relevance_score >= 50
+    GROUP BY j.user_id
+  ),
+  ready AS (
+    SELECT j.user_id, count(*) AS cnt
+    FROM jobs j
+    WHERE j.has_enkel_soknad
+      AND j.relevance_score >= 50
+      AND j.created_at >= p_since
+      AND NOT EXISTS (
+        SELECT 1 FROM applications a
+        WHERE a.job_id = j.id
+          AND a.user_id = j.user_id
+          AND a.status IN ('sent', 'sending')
+      )
+    GROUP BY j.user_id
+  )
+  SELECT us.user_id,
+         au.email::text,
+         coalesce(hot.cnt, 0) AS hot_count,
+         coalesce(ready.cnt, 0) AS ready_finn
+  FROM user_settings us
+  LEFT JOIN auth.users au ON au.id = us.user_id
+  LEFT JOIN hot ON hot.user_id = us.user_id
+  LEFT JOIN ready ON ready.user_id = us.user_id;
+$$;
+
+-- SECURITY DEFINER reads auth.users (every user's email): worker-only
+REVOKE EXECUTE ON FUNCTION get_startup_summary(timestamptz) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION get_startup_summary(timestamptz) TO service_role;
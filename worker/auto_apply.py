@@ -1,11 +1,16 @@
 import asyncio
+import contextlib
+import contextvars
 import os
 import json
+import random
 import re
 import logging
 from logging.handlers import RotatingFileHandler
 import httpx
+import orjson
 import socket
+import time
 import uuid
 from datetime import datetime, timedelta, timezone
 from urllib.parse import urlparse
@@ -25,6 +30,7 @@ from navigation_goals import (
 
 # Import registration processing from register_site module
 from register_site import process_registration as _rs_process_registration
+from register_site import close_http_clients as _rs_close_http_clients
 
 # Load environment variables
 load_dotenv()
@@ -50,6 +56,38 @@ def skyvern_headers() -> dict:
     return headers
 
 
+# Shared HTTP clients (keep-alive pools) — created lazily inside the running loop
+HTTP_LIMITS = httpx.Limits(max_keepalive_connections=20, max_connections=50)
+_skyvern_http: Optional[httpx.AsyncClient] = None
+_telegram_http: Optional[httpx.AsyncClient] = None
+
+
+@contextlib.asynccontextmanager
+async def skyvern_client():
+    """Yield the shared Skyvern HTTP client (not closed on exit, unlike `async with httpx.AsyncClient()`)."""
+    global _skyvern_http
+    if _skyvern_http is None or _skyvern_http.is_closed:
+        _skyvern_http = httpx.AsyncClient(http2=True, limits=HTTP_LIMITS)  # task polls share one connection
+    yield _skyvern_http
+
+
+@contextlib.asynccontextmanager
+async def telegram_client():
+    """Yield the shared Telegram Bot API HTTP client."""
+    global _telegram_http
+    if _telegram_http is None or _telegram_http.is_closed:
+        _telegram_http = httpx.AsyncClient(limits=HTTP_LIMITS)
+    yield _telegram_http
+
+
+async def close_http_clients():
+    """Close shared HTTP clients on shutdown."""
+    for client in (_skyvern_http, _telegram_http):
+        if client is not None and not client.is_closed:
+            await client.aclose()
+    await _rs_close_http_clients()  # registration flows run in this process too
+
+
 FINN_EMAIL = os.getenv("FINN_EMAIL", "")
 FINN_PASSWORD = os.getenv("FINN_PASSWORD", "")
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN", "")
@@ -89,10 +127,26 @@ print(f"🆔 Worker ID: {WORKER_ID} ({WORKER_LOCATION})")
 # --- CONSTANTS ---
 POLL_INTERVAL = 10  # seconds between DB polls
 STUCK_TIMEOUT_MINUTES = 30  # mark 'sending' applications as failed after this
-CLEANUP_EVERY_N_CYCLES = 30  # run cleanup every N poll cycles (~5 min at 10s interval)
+CLEANUP_INTERVAL = 300  # seconds between stuck-application cleanups (own background task)
+HEARTBEAT_INTERVAL = 20  # seconds; tech-bot /worker treats >30s old heartbeats as dead
+RECONCILE_INTERVAL = 120  # seconds; with Realtime connected, safety-net claim this often
+SKYVERN_PING_INTERVAL = 300  # seconds between HF keepalive / failback health pings
+SKYVERN_TASK_CLEANUP_INTERVAL = 1800  # seconds between stale Skyvern task cleanups
+LINKEDIN_SCAN_INTERVAL = 86400  # seconds between LinkedIn scans (daily)
+CLAIM_BATCH_SIZE = 10
+# Only the application columns process_application / FlowRouter actually read
+# (skips generated_prompt and other large text columns on every claim),
+# plus the embedded job fields classify_applications needs (jobs!job_id avoids
+# the ambiguous jobs.application_id back-reference)
+CLAIM_COLUMNS = (
+    "id, job_id, user_id, status, cover_letter_no, cover_letter_uk, skyvern_metadata, "
+    "job:jobs!job_id(id, job_url, external_apply_url, has_enkel_soknad, application_form_type)"
+)
 MAX_CONCURRENT_USERS = int(os.getenv("MAX_CONCURRENT_USERS", "3"))
 RETRY_ATTEMPTS = 3
 RETRY_BACKOFF = [5, 10]  # seconds between retries
+EXTRACTION_POLL_MIN = 0.5  # first extraction-task status poll delay (s)
+EXTRACTION_POLL_MAX = 5.0  # cap for the extraction-task poll delay (s)
 
 FINN_CREDENTIALS_OK = bool(FINN_EMAIL and FINN_PASSWORD)
 
@@ -135,7 +189,7 @@ async def _check_url_health(url: str) -> bool:
         headers = skyvern_headers()
         if HF_TOKEN and "hf.space" in url:
             headers["Authorization"] = f"Bearer {HF_TOKEN}"
-        async with httpx.AsyncClient() as client:
+        async with skyvern_client() as client:
             response = await client.get(f"{url}/api/v1/tasks", headers=headers, timeout=10.0)
             return response.status_code == 200
     except Exception:
@@ -164,6 +218,96 @@ async def check_skyvern_health() -> bool:
     return False
 
 
+class SkyvernBreaker:
+    """
+    Circuit breaker for Skyvern task submission.
+
+    closed: submit normally, no pre-flight health checks.
+    open:   after BREAKER_FAILURE_THRESHOLD consecutive failures, submissions
+            fail fast without HTTP while a background probe checks health with
+            exponential backoff (2^failures s, max BREAKER_MAX_BACKOFF) and
+            closes the breaker once Skyvern answers again.
+    """
+
+    def __init__(self):
+        self.failures = 0
+        self.open_until = 0.0
+        self._probe_task: Optional[asyncio.Task] = None
+
+    @property
+    def is_open(self) -> bool:
+        return self.failures >= BREAKER_FAILURE_THRESHOLD
+
+    def _backoff(self) -> float:
+        return min(BREAKER_MAX_BACKOFF, 2 ** self.failures)
+
+    def record_success(self):
+        self.failures = 0
+        self.open_until = 0.0
+
+    async def record_failure(self):
+        self.failures += 1
+        if not self.is_open:
+            return
+        self.open_until = time.monotonic() + self._backoff()
+        if self._probe_task is None or self._probe_task.done():
+            await log(f"🔌 Skyvern circuit OPEN after {self.failures} failures — probing in {self._backoff():.0f}s")
+            self._probe_task = asyncio.create_task(self._probe_until_closed())
+
+    async def _probe_until_closed(self):
+        while self.is_open:
+            await asyncio.sleep(max(0.0, self.open_until - time.monotonic()))
+            if await check_skyvern_health():
+                self.record_success()
+                await log("🔌 Skyvern circuit CLOSED — health probe OK")
+                return
+            self.failures += 1
+            self.open_until = time.monotonic() + self._backoff()
+
+
+BREAKER_FAILURE_THRESHOLD = 3
+BREAKER_MAX_BACKOFF = 300  # seconds
+skyvern_breaker = SkyvernBreaker()
+
+
+# ============================================
+# IN-PROCESS CACHE
+# ============================================
+
+class TTLCache:
+    """Small in-process cache with per-entry expiry and a size bound (oldest evicted first)."""
+
+    def __init__(self, ttl: float, maxsize: int = 64):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: Dict[Any, tuple] = {}
+
+    def get(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    def set(self, key, value):
+        if key not in self._data and len(self._data) >= self.maxsize:
+            del self._data[next(iter(self._data))]
+        self._data[key] = (time.monotonic() + self.ttl, value)
+
+    def invalidate(self, key=None):
+        if key is None:
+            self._data.clear()
+        else:
+            self._data.pop(key, None)
+
+    def invalidate_matching(self, predicate):
+        for key in [k for k in self._data if predicate(k)]:
+            del self._data[key]
+
+
 # ============================================
 # SITE FORM MEMORY SYSTEM
 # ============================================
@@ -193,7 +337,7 @@ async def extract_memory_from_task(
     headers = skyvern_headers()
     norm_domain = normalize_domain_for_memory(domain)
 
-    async with httpx.AsyncClient() as client:
+    async with skyvern_client() as client:
         steps = await fetch_task_steps(client, task_id, headers)
         if not steps:
             return None
@@ -675,17 +819,15 @@ async def submit_skyvern_task_with_retry(payload: dict, description: str = "task
 
     Returns task_id on success, None on failure.
     """
+    if skyvern_breaker.is_open:
+        await log(f"🔌 Skyvern circuit open — not submitting {description}")
+        return None
+
     headers = skyvern_headers()
 
     for attempt in range(RETRY_ATTEMPTS):
         try:
-            if attempt == 0:
-                # Quick health check before first attempt
-                healthy = await check_skyvern_health()
-                if not healthy:
-                    await log(f"⚠️ Skyvern health check failed before submitting {description}")
-
-            async with httpx.AsyncClient() as client:
+            async with skyvern_client() as client:
                 await log(f"🚀 Sending {description} to Skyvern (attempt {attempt + 1}/{RETRY_ATTEMPTS})...")
                 response = await client.post(
                     f"{SKYVERN_URL}/api/v1/tasks",
@@ -698,14 +840,22 @@ async def submit_skyvern_task_with_retry(payload: dict, description: str = "task
                     task_data = response.json()
                     task_id = task_data.get('task_id')
                     await log(f"✅ Skyvern Task Started! ID: {task_id}")
+                    skyvern_breaker.record_success()
                     return task_id
                 else:
                     await log(f"❌ Skyvern API Error (attempt {attempt + 1}): {response.text}")
+                    if response.status_code >= 500:
+                        await skyvern_breaker.record_failure()
 
         except httpx.ConnectError as e:
             await log(f"❌ Skyvern not reachable (attempt {attempt + 1}): {e}")
+            await skyvern_breaker.record_failure()
         except Exception as e:
             await log(f"❌ Skyvern request failed (attempt {attempt + 1}): {e}")
+            await skyvern_breaker.record_failure()
+
+        if skyvern_breaker.is_open:
+            break
 
         # Backoff before next retry (skip after last attempt)
         if attempt < RETRY_ATTEMPTS - 1:
@@ -717,8 +867,22 @@ async def submit_skyvern_task_with_retry(payload: dict, description: str = "task
     return None
 
 
+# Long-running background loops started by main(); cancelled by run_worker on shutdown
+_background_tasks: set[asyncio.Task] = set()
+
+
+async def cleanup_stuck_applications_loop():
+    """Run cleanup_stuck_applications on its own timer, decoupled from the poll loop."""
+    while True:
+        await asyncio.sleep(CLEANUP_INTERVAL)
+        await cleanup_stuck_applications()
+
+
 async def cleanup_stuck_applications():
-    """Find and fail applications stuck in 'sending' status for too long."""
+    """Find and fail applications stuck in 'sending' status for too long.
+
+    Uses idx_applications_stuck (status, updated_at) so each run only touches stuck rows.
+    """
     try:
         # Release stale claims from any crashed workers
         try:
@@ -1078,34 +1242,56 @@ def extract_domain(url: str) -> str:
         return url
 
 
+CREDENTIALS_CACHE_TTL = 600  # seconds
+_creds_cache = TTLCache(CREDENTIALS_CACHE_TTL, maxsize=1024)  # (domain, user_id) -> (creds,)
+_magic_link_marked = TTLCache(CREDENTIALS_CACHE_TTL, maxsize=1024)  # domains already marked
+
+
+def invalidate_site_credentials(domain: str):
+    """Drop cached credential lookups for a domain (call after writing site_credentials)."""
+    _creds_cache.invalidate_matching(lambda key: key[0] == domain)
+
+
 async def get_site_credentials(domain: str, user_id: str = None) -> dict | None:
     """Check if credentials exist for a site domain, scoped to user_id.
 
     Returns credentials for active sites or magic_link status for sites
-    that require manual login.
+    that require manual login. Lookups (including misses) are cached per
+    (domain, user_id) for CREDENTIALS_CACHE_TTL.
     """
+    cached = _creds_cache.get((domain, user_id))
+    if cached is not None:
+        creds = cached[0]
+        return dict(creds) if creds else None
     try:
-        query = supabase.table("site_credentials") \
-            .select("*") \
-            .eq("site_domain", domain) \
-            .in_("status", ["active", "inactive"])
-        if user_id:
-            query = query.eq("user_id", user_id)
-        response = query.limit(1).execute()
-
-        if response.data and len(response.data) > 0:
-            creds = response.data[0]
-            reg_data = creds.get('registration_data', {}) or {}
-            if reg_data.get('auth_type') == 'magic_link':
-                creds['auth_type'] = 'magic_link'  # For backward compat with caller checks
-                await log(f"🔗 Found magic_link record for {domain}")
-            else:
-                await log(f"✅ Found credentials for {domain}")
-            return creds
-        return None
+        creds = await _fetch_site_credentials(domain, user_id)
     except Exception as e:
+        # Errors are not cached — next call retries the lookup
         await log(f"⚠️ Failed to check credentials for {domain}: {e}")
         return None
+    _creds_cache.set((domain, user_id), (creds,))
+    return dict(creds) if creds else None
+
+
+async def _fetch_site_credentials(domain: str, user_id: str = None) -> dict | None:
+    query = supabase.table("site_credentials") \
+        .select("*") \
+        .eq("site_domain", domain) \
+        .in_("status", ["active", "inactive"])
+    if user_id:
+        query = query.eq("user_id", user_id)
+    response = query.limit(1).execute()
+
+    if response.data and len(response.data) > 0:
+        creds = response.data[0]
+        reg_data = creds.get('registration_data', {}) or {}
+        if reg_data.get('auth_type') == 'magic_link':
+            creds['auth_type'] = 'magic_link'  # For backward compat with caller checks
+            await log(f"🔗 Found magic_link record for {domain}")
+        else:
+            await log(f"✅ Found credentials for {domain}")
+        return creds
+    return None
 
 
 async def check_credentials_for_url(url: str, user_id: str = None) -> tuple:
@@ -1126,6 +1312,8 @@ async def check_credentials_for_url(url: str, user_id: str = None) -> tuple:
 
 async def mark_site_as_magic_link(domain: str):
     """Mark a site as using magic link authentication in site_credentials."""
+    if _magic_link_marked.get(domain):
+        return
     try:
         # Check if record exists
         response = supabase.table("site_credentials") \
@@ -1140,6 +1328,7 @@ async def mark_site_as_magic_link(domain: str):
             existing_status = response.data[0].get('status', '')
             if existing_status == 'active':
                 await log(f"⚠️ SKIPPING magic_link marking for {domain} — active credentials exist!")
+                _magic_link_marked.set(domain, True)
                 return
             # Update existing inactive record
             supabase.table("site_credentials").update({
@@ -1157,6 +1346,8 @@ async def mark_site_as_magic_link(domain: str):
                 "registration_data": {"auth_type": "magic_link", "note": "Uses magic link - manual login required"}
             }).execute()
             await log(f"📝 Created magic_link record for {domain}")
+        _magic_link_marked.set(domain, True)
+        invalidate_site_credentials(domain)
     except Exception as e:
         await log(f"⚠️ Failed to mark {domain} as magic_link: {e}")
 
@@ -1303,6 +1494,7 @@ async def trigger_registration_flow(
                     "password": password_answer.strip(),
                     "status": "active",
                 }, on_conflict="site_domain,email").execute()
+                invalidate_site_credentials(domain)
                 await log(f"💾 Saved credentials for {domain} from user")
                 await send_tech_telegram(chat_id,
                     f"✅ <b>Пароль збережено для {domain}!</b>\n"
@@ -1440,6 +1632,7 @@ async def handle_login_failure(
         supabase.table("site_credentials").update({
             "password": answer.strip()
         }).eq("site_domain", domain).eq("user_id", user_id).execute()
+        invalidate_site_credentials(domain)
         await log(f"💾 Password updated for {domain}")
         await send_tech_telegram(chat_id,
             f"✅ Пароль оновлено для {domain}!\n⏳ Спробую подати заявку знову..."
@@ -1473,7 +1666,7 @@ async def get_active_profile_full(user_id: str = None) -> dict:
             .eq("is_active", True)
         if user_id:
             query = query.eq("user_id", user_id)
-        response = query.limit(1).execute()
+        response = await asyncio.to_thread(query.limit(1).execute)
 
         if response.data and len(response.data) > 0:
             return response.data[0]
@@ -1522,36 +1715,74 @@ def extract_finnkode(url: str) -> str | None:
 
     return None
 
+# ============================================
+# PER-USER DATA CACHE
+# ============================================
+
+USER_DATA_CACHE_TTL = 300  # seconds; KB/profile/resume change rarely during a poll burst
+
+
+_kb_cache = TTLCache(USER_DATA_CACHE_TTL)
+_profile_cache = TTLCache(USER_DATA_CACHE_TTL)
+_resume_cache = TTLCache(USER_DATA_CACHE_TTL)
+
+
+def invalidate_user_cache(user_id: str = None):
+    """Drop cached KB/profile/resume for a user (after we write to their profile or KB)."""
+    _kb_cache.invalidate(user_id)
+    _profile_cache.invalidate(user_id)
+    _resume_cache.invalidate(user_id)
+
+
 async def get_knowledge_base_dict(user_id: str = None) -> dict:
     """Fetches user knowledge base as a clean dictionary, filtered by user_id."""
+    cached = _kb_cache.get(user_id)
+    if cached is not None:
+        return dict(cached)
     try:
         query = supabase.table("user_knowledge_base").select("*")
         if user_id:
             query = query.eq("user_id", user_id)
-        response = query.execute()
+        response = await asyncio.to_thread(query.execute)
         kb_data = {}
         for item in response.data:
             kb_data[item['question']] = item['answer']
-        return kb_data
+        _kb_cache.set(user_id, kb_data)
+        return dict(kb_data)
     except Exception as e:
         await log(f"⚠️ Failed to fetch KB: {e}")
         return {}
 
 async def get_active_profile(user_id: str = None) -> str:
     """Fetches the full text of the currently active CV Profile for a specific user."""
+    cached = _profile_cache.get(user_id)
+    if cached is not None:
+        return cached
     try:
         query = supabase.table("cv_profiles").select("content").eq("is_active", True)
         if user_id:
             query = query.eq("user_id", user_id)
-        response = query.limit(1).execute()
+        response = await asyncio.to_thread(query.limit(1).execute)
         if response.data and len(response.data) > 0:
-            return response.data[0]['content']
+            content = response.data[0]['content']
+            _profile_cache.set(user_id, content)
+            return content
         return "No active profile found."
     except Exception as e:
         await log(f"⚠️ Failed to fetch Active Profile: {e}")
         return ""
 
 async def get_latest_resume_url(user_id: str = None) -> str:
+    """Cached wrapper around _resolve_latest_resume_url (only real URLs are cached)."""
+    cached = _resume_cache.get(user_id)
+    if cached is not None:
+        return cached
+    url = await _resolve_latest_resume_url(user_id)
+    if url and url.startswith("http"):
+        _resume_cache.set(user_id, url)
+    return url
+
+async def _resolve_latest_resume_url(user_id: str = None) -> str:
     """Get resume URL for a specific user from their active CV profile.
 
     Priority:
@@ -1606,7 +1837,7 @@ async def get_latest_resume_url(user_id: str = None) -> str:
         if not storage_bucket:
              storage_bucket = getattr(supabase.storage, "from")('resumes')
 
-        files = storage_bucket.list()
+        files = await asyncio.to_thread(storage_bucket.list)
         if not files:
             return "No resume file found."
 
@@ -1630,7 +1861,7 @@ async def get_latest_resume_url(user_id: str = None) -> str:
         latest_file = files[0]['name']
         await log(f"📄 Using resume: {latest_file}")
 
-        res = storage_bucket.create_signed_url(latest_file, 3600)
+        res = await asyncio.to_thread(storage_bucket.create_signed_url, latest_file, 3600)
         if res and 'signedUrl' in res:
              return res['signedUrl']
         elif res and isinstance(res, str):
@@ -1764,7 +1995,7 @@ IMPORTANT: Extract ALL fields you can see, including:
 
     headers = skyvern_headers()
 
-    async with httpx.AsyncClient() as client:
+    async with skyvern_client() as client:
         try:
             await log("🚀 Sending extraction task to Skyvern...")
             response = await client.post(
@@ -1795,11 +2026,14 @@ async def wait_for_extraction_task(task_id: str, max_wait: int = 300) -> dict:
     """Wait for extraction task to complete and return results."""
     headers = skyvern_headers()
 
-    start_time = datetime.now()
+    start_time = time.monotonic()
+    # Exponential backoff with jitter: fast tasks return quickly, long ones poll rarely
+    delay = EXTRACTION_POLL_MIN
+    last_status = None
 
-    async with httpx.AsyncClient() as client:
+    async with skyvern_client() as client:
         while True:
-            elapsed = (datetime.now() - start_time).total_seconds()
+            elapsed = time.monotonic() - start_time
             if elapsed > max_wait:
                 await log(f"⏰ Extraction task timeout after {max_wait}s")
                 return {"success": False, "error": "timeout", "fields": []}
@@ -1812,8 +2046,12 @@ async def wait_for_extraction_task(task_id: str, max_wait: int = 300) -> dict:
                 )
 
                 if response.status_code == 200:
-                    data = response.json()
+                    data = orjson.loads(response.content)
                     status = data.get('status', '')
+                    if status != last_status:
+                        # Newly running task: sample it quickly again
+                        last_status = status
+                        delay = EXTRACTION_POLL_MIN
 
                     if status == 'completed':
                         extracted = data.get('extracted_information', {})
@@ -1837,15 +2075,12 @@ async def wait_for_extraction_task(task_id: str, max_wait: int = 300) -> dict:
                         await log(f"❌ Extraction failed: {error_msg}")
                         return {"success": False, "error": error_msg, "fields": []}
 
-                    else:
-                        # Still running
-                        await asyncio.sleep(3)
-                else:
-                    await asyncio.sleep(3)
-
             except Exception as e:
                 await log(f"⚠️ Error checking extraction status: {e}")
-                await asyncio.sleep(3)
+
+            # Still running, non-200 or request error
+            await asyncio.sleep(delay + random.uniform(0, 0.25))
+            delay = min(delay * 1.6, EXTRACTION_POLL_MAX)
 
 
 # ============================================
@@ -2358,32 +2593,30 @@ async def send_smart_confirmation(
         ])
 
         # Send to Telegram
-        async with httpx.AsyncClient() as client:
-            tg_response = await client.post(
-                f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage",
-                json={
-                    "chat_id": chat_id,
-                    "text": message,
-                    "parse_mode": "HTML",
-                    "reply_markup": keyboard
-                },
-                timeout=10.0
-            )
+        tg_response = await telegram.post(
+            TELEGRAM_BOT_TOKEN, "sendMessage", chat_id,
+            json={
+                "chat_id": chat_id,
+                "text": message,
+                "parse_mode": "HTML",
+                "reply_markup": keyboard
+            }
+        )
 
-            if tg_response.status_code == 200:
-                tg_data = tg_response.json()
-                msg_id = tg_data.get('result', {}).get('message_id')
+        if tg_response.status_code == 200:
+            tg_data = tg_response.json()
+            msg_id = tg_data.get('result', {}).get('message_id')
 
-                # Update confirmation with message_id
-                supabase.table("application_confirmations").update({
-                    "telegram_message_id": str(msg_id)
-                }).eq("id", confirmation_id).execute()
+            # Update confirmation with message_id
+            supabase.table("application_confirmations").update({
+                "telegram_message_id": str(msg_id)
+            }).eq("id", confirmation_id).execute()
 
-                await log(f"📤 Smart confirmation sent: {confirmation_id}")
-                return confirmation_id
-            else:
-                await log(f"❌ Telegram send failed: {tg_response.status_code}")
-                return None
+            await log(f"📤 Smart confirmation sent: {confirmation_id}")
+            return confirmation_id
+        else:
+            await log(f"❌ Telegram send failed: {tg_response.status_code}")
+            return None
 
     except Exception as e:
         await log(f"❌ Smart confirmation error: {e}")
@@ -2468,17 +2701,15 @@ async def ask_missing_fields_telegram(
     }).eq("id", confirmation_id).execute()
 
     # Send question
-    async with httpx.AsyncClient() as client:
-        await client.post(
-            f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage",
-            json={
-                "chat_id": chat_id,
-                "text": message,
-                "parse_mode": "HTML",
-                "reply_markup": keyboard if keyboard["inline_keyboard"] else None
-            },
-            timeout=10.0
-        )
+    await telegram.post(
+        TELEGRAM_BOT_TOKEN, "sendMessage", chat_id,
+        json={
+            "chat_id": chat_id,
+            "text": message,
+            "parse_mode": "HTML",
+            "reply_markup": keyboard if keyboard["inline_keyboard"] else None
+        }
+    )
 
 
 async def save_field_to_kb(label: str, value: str, user_id: str = None) -> bool:
@@ -2509,6 +2740,7 @@ async def save_field_to_kb(label: str, value: str, user_id: str = None) -> bool:
                 "user_id": user_id
             }).execute()
 
+        _kb_cache.invalidate(user_id)
         await log(f"💾 Saved to KB: {label} = {value[:20]}...")
         return True
     except Exception as e:
@@ -2611,6 +2843,38 @@ async def get_telegram_chat_id_for_user(user_id: str) -> str | None:
         return None
 
 
+class _UserSlot:
+    """MAX_CONCURRENT_USERS slot held by one process_user_applications task.
+
+    Released at most once, and only by the task that acquired it: tasks spawned
+    from inside inherit the context variable but must not give the slot away.
+    """
+
+    def __init__(self, semaphore: asyncio.Semaphore):
+        self.semaphore = semaphore
+        self.owner = None
+        self.held = False
+
+    async def __aenter__(self):
+        await self.semaphore.acquire()
+        self.owner = asyncio.current_task()
+        self.held = True
+        _user_slot.set(self)
+        return self
+
+    async def __aexit__(self, *exc):
+        self.release()
+
+    def release(self):
+        if self.held and asyncio.current_task() is self.owner:
+            self.held = False
+            self.semaphore.release()
+
+
+# Slot of the current process_user_applications task (None outside of it)
+_user_slot: contextvars.ContextVar = contextvars.ContextVar("_user_slot", default=None)
+
+
 async def ask_skyvern_question(
     user_id: str,
     field_name: str,
@@ -2624,8 +2888,14 @@ async def ask_skyvern_question(
     """Ask user a question via Telegram during Skyvern form filling.
 
     Creates a record in registration_questions (with flow_id=NULL, field_context='skyvern_form')
-    and polls for the answer.
+    and polls for the answer. The caller's MAX_CONCURRENT_USERS slot is handed to
+    other users for the wait and not taken back: the live Skyvern session must not
+    queue behind their runs, so the rest of this user's batch runs outside the cap.
     """
+    slot = _user_slot.get()
+    if slot is not None:
+        slot.release()
+
     chat_id = await get_telegram_chat_id_for_user(user_id)
     if not chat_id:
         await log(f"⚠️ No telegram_chat_id for user {user_id}, skipping Q&A for {field_name}")
@@ -2735,6 +3005,7 @@ async def save_answer_to_profile(user_id: str, field_name: str, value: str):
         supabase.table("cv_profiles") \
             .update({"structured_content": structured}) \
             .eq("id", profile_id).execute()
+        invalidate_user_cache(user_id)
 
         await log(f"💾 Saved {field_name}={value[:20]}... to profile")
     except Exception as e:
@@ -3199,24 +3470,128 @@ async def trigger_skyvern_task(job_url: str, app_data: dict, kb_data: dict, prof
     )
 
 
+# ============================================
+# TELEGRAM SEND QUEUE (rate limited)
+# ============================================
+
+TELEGRAM_GLOBAL_RATE = 30     # messages/second per bot (Telegram global limit)
+TELEGRAM_PER_CHAT_RATE = 1    # messages/second per chat
+TELEGRAM_SEND_WORKERS = 5     # concurrent workers for fire-and-forget sends
+TELEGRAM_MAX_429_RETRIES = 3
+
+
+class TokenBucket:
+    """Simple asyncio token bucket: `rate` tokens/second, bursts up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated = asyncio.get_running_loop().time()
+
+    async def acquire(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            now = loop.time()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class TelegramSender:
+    """
+    Shared Telegram sender for both bots.
+
+    - Global token bucket per bot token (30 msg/s) and per-chat bucket (1 msg/s)
+    - On HTTP 429 honors `retry_after` by pausing only that chat
+    - enqueue() runs sends in the background on a small worker pool
+    """
+
+    def __init__(self, global_rate: float = TELEGRAM_GLOBAL_RATE,
+                 per_chat_rate: float = TELEGRAM_PER_CHAT_RATE,
+                 workers: int = TELEGRAM_SEND_WORKERS):
+        self.global_rate = global_rate
+        self.per_chat_rate = per_chat_rate
+        self.workers = workers
+        self._global: Dict[str, TokenBucket] = {}
+        self._per_chat: Dict[tuple, TokenBucket] = {}
+        self._paused_until: Dict[tuple, float] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker_tasks: list = []
+
+    async def _throttle(self, token: str, chat_id: str):
+        key = (token, str(chat_id))
+        pause = self._paused_until.get(key, 0) - asyncio.get_running_loop().time()
+        if pause > 0:
+            await asyncio.sleep(pause)
+        if token not in self._global:
+            self._global[token] = TokenBucket(self.global_rate)
+        if key not in self._per_chat:
+            # Small burst so multi-part notifications are not serialized to 1/s
+            self._per_chat[key] = TokenBucket(self.per_chat_rate, capacity=3)
+        await self._global[token].acquire()
+        await self._per_chat[key].acquire()
+
+    async def post(self, token: str, method: str, chat_id: str, timeout: float = 10.0, **kwargs) -> Optional[httpx.Response]:
+        """POST to a Bot API method under rate limits. Returns the final response (or None)."""
+        response = None
+        for _ in range(TELEGRAM_MAX_429_RETRIES):
+            await self._throttle(token, chat_id)
+            async with telegram_client() as client:
+                response = await client.post(
+                    f"https://api.telegram.org/bot{token}/{method}",
+                    timeout=timeout,
+                    **kwargs
+                )
+            if response.status_code != 429:
+                return response
+            try:
+                retry_after = response.json().get('parameters', {}).get('retry_after', 1)
+            except Exception:
+                retry_after = 1
+            await log(f"⏳ Telegram 429 for chat {chat_id}, retry after {retry_after}s")
+            self._paused_until[(token, str(chat_id))] = asyncio.get_running_loop().time() + retry_after
+        return response
+
+    def enqueue(self, send_func, *args, **kwargs):
+        """Fire-and-forget: schedule `await send_func(*args, **kwargs)` on the worker pool."""
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+            self._worker_tasks = [
+                asyncio.create_task(self._worker()) for _ in range(self.workers)
+            ]
+        self._queue.put_nowait((send_func, args, kwargs))
+
+    async def _worker(self):
+        while True:
+            send_func, args, kwargs = await self._queue.get()
+            try:
+                await send_func(*args, **kwargs)
+            except Exception as e:
+                await log(f"⚠️ Telegram queue error: {e}")
+            finally:
+                self._queue.task_done()
+
+
+telegram = TelegramSender()
+
+
 async def send_telegram(chat_id: str, text: str, reply_markup: dict = None):
     """Send a Telegram notification."""
     if not TELEGRAM_BOT_TOKEN or not chat_id:
         return None
     try:
-        async with httpx.AsyncClient() as client:
-            payload = {"chat_id": chat_id, "text": text, "parse_mode": "HTML"}
-            if reply_markup:
-                payload["reply_markup"] = reply_markup
-            response = await client.post(
-                f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage",
-                json=payload,
-                timeout=10.0
-            )
-            if response.status_code == 200:
-                data = response.json()
-                return data.get('result', {}).get('message_id')
-            return None
+        payload = {"chat_id": chat_id, "text": text, "parse_mode": "HTML"}
+        if reply_markup:
+            payload["reply_markup"] = reply_markup
+        response = await telegram.post(TELEGRAM_BOT_TOKEN, "sendMessage", chat_id, json=payload)
+        if response is not None and response.status_code == 200:
+            data = response.json()
+            return data.get('result', {}).get('message_id')
+        return None
     except Exception as e:
         await log(f"⚠️ Telegram error: {e}")
         return None
@@ -3227,22 +3602,17 @@ async def send_telegram_photo(chat_id: str, photo_url: str, caption: str = None)
     if not TELEGRAM_BOT_TOKEN or not chat_id:
         return None
     try:
-        async with httpx.AsyncClient() as client:
-            payload = {
-                "chat_id": chat_id,
-                "photo": photo_url,
-                "parse_mode": "HTML"
-            }
-            if caption:
-                payload["caption"] = caption[:1024]  # Telegram caption limit
-            response = await client.post(
-                f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendPhoto",
-                json=payload,
-                timeout=15.0
-            )
-            if response.status_code == 200:
-                return response.json().get('result', {}).get('message_id')
-            return None
+        payload = {
+            "chat_id": chat_id,
+            "photo": photo_url,
+            "parse_mode": "HTML"
+        }
+        if caption:
+            payload["caption"] = caption[:1024]  # Telegram caption limit
+        response = await telegram.post(TELEGRAM_BOT_TOKEN, "sendPhoto", chat_id, timeout=15.0, json=payload)
+        if response is not None and response.status_code == 200:
+            return response.json().get('result', {}).get('message_id')
+        return None
     except Exception as e:
         await log(f"⚠️ Telegram photo error: {e}")
         return None
@@ -3256,23 +3626,20 @@ async def send_telegram_photo_file(chat_id: str, file_path: str, caption: str =
         await log(f"⚠️ Screenshot file not found: {file_path}")
         return None
     try:
-        async with httpx.AsyncClient() as client:
-            data = {"chat_id": chat_id, "parse_mode": "HTML"}
-            if caption:
-                data["caption"] = caption[:1024]
-            with open(file_path, "rb") as f:
-                files = {"photo": ("screenshot.png", f, "image/png")}
-                response = await client.post(
-                    f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendPhoto",
-                    data=data,
-                    files=files,
-                    timeout=30.0
-                )
-            if response.status_code == 200:
-                return response.json().get('result', {}).get('message_id')
-            else:
-                await log(f"⚠️ Telegram photo upload failed: {response.status_code} {response.text[:200]}")
-            return None
+        data = {"chat_id": chat_id, "parse_mode": "HTML"}
+        if caption:
+            data["caption"] = caption[:1024]
+        with open(file_path, "rb") as f:
+            files = {"photo": ("screenshot.png", f, "image/png")}
+            response = await telegram.post(
+                TELEGRAM_BOT_TOKEN, "sendPhoto", chat_id, timeout=30.0,
+                data=data, files=files
+            )
+        if response is not None and response.status_code == 200:
+            return response.json().get('result', {}).get('message_id')
+        elif response is not None:
+            await log(f"⚠️ Telegram photo upload failed: {response.status_code} {response.text[:200]}")
+        return None
     except Exception as e:
         await log(f"⚠️ Telegram photo file error: {e}")
         return None
@@ -3347,18 +3714,13 @@ async def edit_telegram_message(chat_id: str, message_id: int, text: str):
         return
 
     try:
-        async with httpx.AsyncClient() as client:
-            payload = {
-                "chat_id": chat_id,
-                "message_id": message_id,
-                "text": text,
-                "parse_mode": "HTML"
-            }
-            await client.post(
-                f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/editMessageText",
-                json=payload,
-                timeout=10.0
-            )
+        payload = {
+            "chat_id": chat_id,
+            "message_id": message_id,
+            "text": text,
+            "parse_mode": "HTML"
+        }
+        await telegram.post(TELEGRAM_BOT_TOKEN, "editMessageText", chat_id, json=payload)
     except Exception as e:
         await log(f"⚠️ Telegram edit error: {e}")
 
@@ -3373,17 +3735,12 @@ async def send_tech_telegram(chat_id: str, text: str):
     if not token or not chat_id:
         return None
     try:
-        async with httpx.AsyncClient() as client:
-            payload = {"chat_id": chat_id, "text": text, "parse_mode": "HTML"}
-            response = await client.post(
-                f"https://api.telegram.org/bot{token}/sendMessage",
-                json=payload,
-                timeout=10.0
-            )
-            if response.status_code == 200:
-                data = response.json()
-                return data.get('result', {}).get('message_id')
-            return None
+        payload = {"chat_id": chat_id, "text": text, "parse_mode": "HTML"}
+        response = await telegram.post(token, "sendMessage", chat_id, json=payload)
+        if response is not None and response.status_code == 200:
+            data = response.json()
+            return data.get('result', {}).get('message_id')
+        return None
     except Exception as e:
         await log(f"⚠️ Tech telegram error: {e}")
         return None
@@ -3397,21 +3754,18 @@ async def send_tech_telegram_photo_file(chat_id: str, file_path: str, caption: s
     if not os.path.exists(file_path):
         return None
     try:
-        async with httpx.AsyncClient() as client:
-            data = {"chat_id": chat_id, "parse_mode": "HTML"}
-            if caption:
-                data["caption"] = caption[:1024]
-            with open(file_path, "rb") as f:
-                files = {"photo": ("screenshot.png", f, "image/png")}
-                response = await client.post(
-                    f"https://api.telegram.org/bot{token}/sendPhoto",
-                    data=data,
-                    files=files,
-                    timeout=30.0
-                )
-            if response.status_code == 200:
-                return response.json().get('result', {}).get('message_id')
-            return None
+        data = {"chat_id": chat_id, "parse_mode": "HTML"}
+        if caption:
+            data["caption"] = caption[:1024]
+        with open(file_path, "rb") as f:
+            files = {"photo": ("screenshot.png", f, "image/png")}
+            response = await telegram.post(
+                token, "sendPhoto", chat_id, timeout=30.0,
+                data=data, files=files
+            )
+        if response is not None and response.status_code == 200:
+            return response.json().get('result', {}).get('message_id')
+        return None
     except Exception as e:
         await log(f"⚠️ Tech telegram photo error: {e}")
         return None
@@ -3423,18 +3777,13 @@ async def edit_tech_telegram_message(chat_id: str, message_id: int, text: str):
     if not token or not chat_id or not message_id:
         return
     try:
-        async with httpx.AsyncClient() as client:
-            payload = {
-                "chat_id": chat_id,
-                "message_id": message_id,
-                "text": text,
-                "parse_mode": "HTML"
-            }
-            await client.post(
-                f"https://api.telegram.org/bot{token}/editMessageText",
-                json=payload,
-                timeout=10.0
-            )
+        payload = {
+            "chat_id": chat_id,
+            "message_id": message_id,
+            "text": text,
+            "parse_mode": "HTML"
+        }
+        await telegram.post(token, "editMessageText", chat_id, json=payload)
     except Exception as e:
         await log(f"⚠️ Tech telegram edit error: {e}")
 
@@ -3776,6 +4125,8 @@ async def wait_for_registration_completion(flow_id: str, chat_id: str = None, ma
 
             if status == 'completed':
                 await log(f"✅ Registration flow completed!")
+                # Registration wrote new site_credentials — drop stale cached lookups
+                _creds_cache.invalidate()
                 return True
 
             if status == 'failed':
@@ -3916,7 +4267,7 @@ async def cancel_skyvern_task(task_id: str) -> bool:
 
     headers = skyvern_headers()
 
-    async with httpx.AsyncClient() as client:
+    async with skyvern_client() as client:
         try:
             # Try POST /cancel endpoint first
             response = await client.post(
@@ -3957,7 +4308,7 @@ async def fetch_task_steps(client, task_id: str, headers: dict) -> list:
             timeout=10.0
         )
         if response.status_code == 200:
-            data = response.json()
+            data = orjson.loads(response.content)
             if isinstance(data, list):
                 return data
         return []
@@ -4081,7 +4432,7 @@ async def monitor_task_status(task_id, chat_id: str = None, job_title: str = Non
         )
         dashboard_msg_id = await send_tech_telegram(chat_id, dashboard_text)
 
-    async with httpx.AsyncClient() as client:
+    async with skyvern_client() as client:
         while True:
             # Check if user cancelled (status changed back to 'approved')
             if app_id:
@@ -4102,7 +4453,7 @@ async def monitor_task_status(task_id, chat_id: str = None, job_title: str = Non
                 )
 
                 if response.status_code == 200:
-                    data = response.json()
+                    data = orjson.loads(response.content)
                     status = data.get('status')
                     extracted_data = data.get('extracted_information', {}) or {}
 
@@ -4464,7 +4815,7 @@ IMPORTANT: Do NOT fill any forms. Only extract the external application URL.
         }
 
         headers = skyvern_headers()
-        async with httpx.AsyncClient() as client:
+        async with skyvern_client() as client:
             resp = await client.post(
                 f"{SKYVERN_URL}/api/v1/tasks",
                 json=payload,
@@ -4492,7 +4843,7 @@ IMPORTANT: Do NOT fill any forms. Only extract the external application URL.
                 )
                 if status_resp.status_code != 200:
                     continue
-                task = status_resp.json()
+                task = orjson.loads(status_resp.content)
                 status = task.get("status", "")
 
                 if status == "completed":
@@ -4513,7 +4864,7 @@ IMPORTANT: Do NOT fill any forms. Only extract the external application URL.
                             timeout=10.0
                         )
                         if steps_resp.status_code == 200:
-                            steps = steps_resp.json()
+                            steps = orjson.loads(steps_resp.content)
                             if steps:
                                 last_step = steps[-1]
                                 nav_url = last_step.get("output", {}).get("url", "") if isinstance(last_step.get("output"), dict) else ""
@@ -4969,17 +5320,18 @@ async def process_application(app, skip_confirmation: bool = False):
         task_id = await trigger_finn_apply_task(apply_url_to_use, app, profile_data)
 
         if task_id:
+            started_at = datetime.now().isoformat()
             skyvern_meta = {
                 "task_id": task_id,
                 "finn_apply": True,
                 "source": "worker",
-                "started_at": datetime.now().isoformat()
+                "started_at": started_at
             }
 
             supabase.table("applications").update({
                 "status": "manual_review",
                 "skyvern_metadata": skyvern_meta,
-                "sent_at": datetime.now().isoformat()
+                "sent_at": started_at
             }).eq("id", app_id).execute()
 
             if chat_id:
@@ -5003,12 +5355,14 @@ async def process_application(app, skip_confirmation: bool = False):
                 await log(f"🛑 Task cancelled by user")
                 return False
 
-            # Handle magic link detection
+            # Handle magic link detection (row is already in 'manual_review' from the launch update)
             if final_status == 'magic_link':
-                supabase.table("applications").update({"status": "manual_review"}).eq("id", app_id).execute()
                 return False
 
-            supabase.table("applications").update({"status": final_status}).eq("id", app_id).execute()
+            supabase.table("applications").update({
+                "status": final_status,
+                "updated_at": datetime.now(timezone.utc).isoformat()
+            }).eq("id", app_id).execute()
 
             # Save form memory (FINN flow)
             try:
@@ -5027,7 +5381,7 @@ async def process_application(app, skip_confirmation: bool = False):
                 await update_confirmation_submitted(confirmation_id)
 
             if chat_id and final_status == 'sent':
-                await send_telegram(chat_id, f"✅ <b>Заявку відправлено!</b>\n\n📋 {job_title}")
+                telegram.enqueue(send_telegram, chat_id, f"✅ <b>Заявку відправлено!</b>\n\n📋 {job_title}")
             return final_status == 'sent'
         else:
             await log("💾 FINN task failed to start")
@@ -5036,7 +5390,7 @@ async def process_application(app, skip_confirmation: bool = False):
                 "skyvern_metadata": {"error_message": "Skyvern FINN task failed to start after retries. Check if Skyvern is running.", "failure_reason": "skyvern_start_failed"}
             }).eq("id", app_id).execute()
             if chat_id:
-                await send_tech_telegram(chat_id, f"❌ <b>Помилка запуску FINN</b>\n\n📋 {job_title}")
+                telegram.enqueue(send_tech_telegram, chat_id, f"❌ <b>Помилка запуску FINN</b>\n\n📋 {job_title}")
             return False
 
     else:
@@ -5192,19 +5546,22 @@ async def process_application(app, skip_confirmation: bool = False):
                     return False
 
         # Proceed with form filling
-        kb_data = await get_knowledge_base_dict(user_id)
-        profile_text = await get_active_profile(user_id)
-        resume_url = await get_latest_resume_url(user_id)
+        kb_data, profile_text, resume_url = await asyncio.gather(
+            get_knowledge_base_dict(user_id),
+            get_active_profile(user_id),
+            get_latest_resume_url(user_id),
+        )
 
         task_id = await trigger_skyvern_task_with_credentials(
             apply_url, app, kb_data, profile_text, resume_url, credentials, user_id
         )
 
         if task_id:
+            started_at = datetime.now().isoformat()
             skyvern_meta = {
                 "task_id": task_id,
                 "resume_url": resume_url,
-                "started_at": datetime.now().isoformat(),
+                "started_at": started_at,
                 "with_credentials": has_creds,
                 "domain": domain
             }
@@ -5212,7 +5569,7 @@ async def process_application(app, skip_confirmation: bool = False):
             supabase.table("applications").update({
                 "status": "manual_review",
                 "skyvern_metadata": skyvern_meta,
-                "sent_at": datetime.now().isoformat()
+                "sent_at": started_at
             }).eq("id", app_id).execute()
 
             if chat_id:
@@ -5240,7 +5597,7 @@ async def process_application(app, skip_confirmation: bool = False):
             if final_status == 'magic_link':
                 await log(f"🔗 Marking {domain} as magic_link site")
                 await mark_site_as_magic_link(domain)
-                supabase.table("applications").update({"status": "manual_review"}).eq("id", app_id).execute()
+                # Row is already in 'manual_review' from the launch update
                 return False
 
             # Handle login failed with password recovery
@@ -5252,7 +5609,8 @@ async def process_application(app, skip_confirmation: bool = False):
                 return False  # Will be picked up in next poll cycle
 
             supabase.table("applications").update({
-                "status": final_status
+                "status": final_status,
+                "updated_at": datetime.now(timezone.utc).isoformat()
             }).eq("id", app_id).execute()
 
             # Save form memory (standard flow)
@@ -5272,7 +5630,7 @@ async def process_application(app, skip_confirmation: bool = False):
                 await update_confirmation_submitted(confirmation_id)
 
             if chat_id and final_status == 'sent':
-                await send_telegram(str(chat_id), f"✅ <b>Заявку відправлено!</b>\n\n📋 {job_title}")
+                telegram.enqueue(send_telegram, str(chat_id), f"✅ <b>Заявку відправлено!</b>\n\n📋 {job_title}")
 
             return final_status == 'sent'
 
@@ -5284,10 +5642,24 @@ async def process_application(app, skip_confirmation: bool = False):
             }).eq("id", app_id).execute()
 
             if chat_id:
-                await send_tech_telegram(chat_id, f"❌ <b>Помилка запуску Skyvern</b>\n\n📋 {job_title}")
+                telegram.enqueue(send_tech_telegram, chat_id, f"❌ <b>Помилка запуску Skyvern</b>\n\n📋 {job_title}")
 
             return False
 
+def _is_finn_easy_job(job_url: str, external_apply_url: str, has_enkel_soknad: bool, form_type: str) -> bool:
+    """Check if a job is FINN Enkel Søknad - 3 cases:
+    1. Direct FINN job with finn_easy markers
+    2. NAV/other job with FINN external_apply_url
+    3. Has finn_easy markers with FINN in external_apply_url
+    """
+    easy = has_enkel_soknad or form_type == 'finn_easy'
+    return bool(
+        (easy and job_url and 'finn.no' in job_url)
+        or (external_apply_url and 'finn.no/job/apply' in external_apply_url)
+        or (easy and external_apply_url and 'finn.no' in external_apply_url)
+    )
+
+
 async def classify_applications(applications: list) -> tuple:
     """Classify applications into FINN Enkel Søknad and others.
 
@@ -5296,39 +5668,30 @@ async def classify_applications(applications: list) -> tuple:
     finn_apps = []
     other_apps = []
 
-    for app in applications:
-        job_id = app['job_id']
+    # Job fields normally come embedded from the claim query; fetch the rest in one batch
+    jobs_by_id = {app['job_id']: app['job'] for app in applications if app.get('job')}
+    job_ids = list({app['job_id'] for app in applications
+                    if app.get('job_id') and app['job_id'] not in jobs_by_id})
+    if job_ids:
         try:
-            job_res = supabase.table("jobs").select(
-                "job_url, external_apply_url, has_enkel_soknad, application_form_type"
-            ).eq("id", job_id).single().execute()
-
-            if job_res.data:
-                job_url = job_res.data.get('job_url', '')
-                external_apply_url = job_res.data.get('external_apply_url', '')
-                has_enkel_soknad = job_res.data.get('has_enkel_soknad', False)
-                form_type = job_res.data.get('application_form_type', '')
-
-                # Check if FINN Enkel Søknad - 3 cases:
-                # 1. Direct FINN job with finn_easy markers
-                # 2. NAV/other job with FINN external_apply_url
-                # 3. Has finn_easy markers with FINN in external_apply_url
-                is_finn = False
-
-                if job_url and 'finn.no' in job_url and (has_enkel_soknad or form_type == 'finn_easy'):
-                    is_finn = True
-                elif external_apply_url and 'finn.no/job/apply' in external_apply_url:
-                    is_finn = True
-                elif (has_enkel_soknad or form_type == 'finn_easy') and external_apply_url and 'finn.no' in external_apply_url:
-                    is_finn = True
-
-                if is_finn:
-                    finn_apps.append(app)
-                else:
-                    other_apps.append(app)
-            else:
-                other_apps.append(app)
-        except:
+            jobs_res = await asyncio.to_thread(
+                supabase.table("jobs").select(
+                    "id, job_url, external_apply_url, has_enkel_soknad, application_form_type"
+                ).in_("id", job_ids).execute
+            )
+            jobs_by_id.update({j['id']: j for j in (jobs_res.data or [])})
+        except Exception as e:
+            await log(f"⚠️ Failed to load jobs for classification: {e}")
+
+    get_job = jobs_by_id.get
+    for app in applications:
+        job = get_job(app.get('job_id'))
+        if job and _is_finn_easy_job(
+            job.get('job_url'), job.get('external_apply_url'),
+            job.get('has_enkel_soknad'), job.get('application_form_type'),
+        ):
+            finn_apps.append(app)
+        else:
             other_apps.append(app)
 
     return finn_apps, other_apps
@@ -5350,7 +5713,8 @@ async def process_user_applications(user_id: str, apps: list, semaphore: asyncio
     tag = f"[{user_id[:8]}]"
     processed = 0
 
-    async with semaphore:
+    # _UserSlot lets ask_skyvern_question hand the slot to other users during long human waits
+    async with _UserSlot(semaphore):
         await log(f"{tag} 🔄 Processing {len(apps)} app(s)")
         try:
             finn_apps, other_apps = await classify_applications(apps)
@@ -5363,18 +5727,19 @@ async def process_user_applications(user_id: str, apps: list, semaphore: asyncio
             # Block FINN applications if credentials not configured
             if finn_apps and not FINN_CREDENTIALS_OK:
                 await log(f"{tag} ❌ FINN credentials not configured - failing {len(finn_apps)} FINN app(s)")
-                for app in finn_apps:
-                    try:
-                        supabase.table("applications").update({
-                            "status": "failed",
-                            "skyvern_metadata": {
-                                "error_message": "FINN credentials (FINN_EMAIL/FINN_PASSWORD) not configured in worker .env",
-                                "failure_reason": "finn_credentials_missing"
-                            }
-                        }).eq("id", app["id"]).execute()
-                        clear_claim(app["id"])
-                    except Exception as e:
-                        await log(f"{tag} ⚠️ Failed to mark app {app['id'][:8]} as failed: {e}")
+                # Single UPDATE for all of them (also clears the worker claim)
+                try:
+                    supabase.table("applications").update({
+                        "status": "failed",
+                        "worker_id": None,
+                        "claimed_at": None,
+                        "skyvern_metadata": {
+                            "error_message": "FINN credentials (FINN_EMAIL/FINN_PASSWORD) not configured in worker .env",
+                            "failure_reason": "finn_credentials_missing"
+                        }
+                    }).in_("id", [app["id"] for app in finn_apps]).execute()
+                except Exception as e:
+                    await log(f"{tag} ⚠️ Failed to mark {len(finn_apps)} FINN app(s) as failed: {e}")
                 finn_apps = []
 
             # Process FINN apps sequentially (one at a time, queue)
@@ -5438,11 +5803,19 @@ async def process_finn_applications(applications: list):
 async def print_startup_summary():
     """Print startup summary with job statistics and next steps."""
     try:
-        users_res = supabase.table("user_settings").select("user_id, telegram_chat_id").execute()
-        users = users_res.data or []
-
-        sending_res = supabase.table("applications").select("id", count="exact").eq("status", "sending").execute()
-        approved_res = supabase.table("applications").select("id", count="exact").eq("status", "approved").execute()
+        today_start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0).isoformat()
+
+        # Per-user stats (email, hot jobs, today's unsent FINN Easy) come from one
+        # server-side join; independent queries run concurrently
+        summary_res, sending_res, approved_res = await asyncio.gather(
+            asyncio.to_thread(supabase.rpc("get_startup_summary", {"p_since": today_start}).execute),
+            asyncio.to_thread(supabase.table("applications").select("id", count="exact").eq("status", "sending").execute),
+            asyncio.to_thread(supabase.table("applications").select("id", count="exact").eq("status", "approved").execute),
+            return_exceptions=True,
+        )
+        for res in (sending_res, approved_res):
+            if isinstance(res, Exception):
+                raise res
         sending_count = sending_res.count or 0
         approved_count = approved_res.count or 0
 
@@ -5450,39 +5823,20 @@ async def print_startup_summary():
         await log("              ✅ СИСТЕМА ГОТОВА ДО РОБОТИ")
         await log("=" * 60)
 
-        for u in users:
-            uid = u["user_id"]
-            # Get username
-            try:
-                email_res = supabase.rpc("get_user_email", {"uid": uid}).execute()
-                email = (email_res.data or {}).get("email", uid[:8])
-                username = email.split("@")[0] if "@" in str(email) else str(email)[:8]
-            except Exception:
-                username = uid[:8]
-
-            # Hot jobs (relevance >= 50)
-            hot_res = supabase.table("jobs").select("id", count="exact") \
-                .eq("user_id", uid).gte("relevance_score", 50).execute()
-            hot_count = hot_res.count or 0
-
-            # Today's FINN Easy without sent/sending apps
-            today_start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0).isoformat()
-            finn_res = supabase.table("jobs").select("id") \
-                .eq("user_id", uid).eq("has_enkel_soknad", True) \
-                .gte("relevance_score", 50).gte("created_at", today_start).execute()
-            finn_ids = [j["id"] for j in (finn_res.data or [])]
-
-            ready_finn = 0
-            if finn_ids:
-                sent_res = supabase.table("applications").select("job_id") \
-                    .eq("user_id", uid).in_("status", ["sent", "sending"]) \
-                    .in_("job_id", finn_ids).execute()
-                sent_job_ids = {a["job_id"] for a in (sent_res.data or [])}
-                ready_finn = len([fid for fid in finn_ids if fid not in sent_job_ids])
+        if isinstance(summary_res, Exception):
+            await log(f"⚠️ Could not load per-user stats: {summary_res}")
+            summary_rows = []
+        else:
+            summary_rows = summary_res.data or []
+
+        for row in summary_rows:
+            uid = row["user_id"]
+            email = row.get("email") or uid[:8]
+            username = email.split("@")[0] if "@" in str(email) else str(email)[:8]
 
             await log(f"👤 {username}")
-            await log(f"   🎯 Релевантних (≥50%): {hot_count}")
-            await log(f"   ⚡ FINN Easy сьогодні: {ready_finn}")
+            await log(f"   🎯 Релевантних (≥50%): {row.get('hot_count') or 0}")
+            await log(f"   ⚡ FINN Easy сьогодні: {row.get('ready_finn') or 0}")
 
         await log("")
         await log(f"📊 ЧЕРГА: 📨 Sending: {sending_count} | ✅ Approved: {approved_count}")
@@ -5503,7 +5857,7 @@ async def cleanup_stale_skyvern_tasks():
     This prevents queue blockage when worker restarts and loses track of tasks.
     """
     try:
-        async with httpx.AsyncClient() as client:
+        async with skyvern_client() as client:
             headers = skyvern_headers()
             resp = await client.get(
                 f"{SKYVERN_URL}/api/v1/tasks?status=running",
@@ -5544,6 +5898,58 @@ async def cleanup_stale_skyvern_tasks():
         await log(f"⚠️ Skyvern task cleanup error: {e}")
 
 
+async def heartbeat_loop(stats: dict):
+    """Write worker_heartbeat on a fixed cadence, independent of the poll loop.
+
+    Runs as its own task so the heartbeat stays fresh while main() is busy
+    processing a long batch; main() only updates the shared `stats` dict.
+    """
+    while True:
+        await asyncio.sleep(HEARTBEAT_INTERVAL)
+        try:
+            await asyncio.to_thread(supabase.table("worker_heartbeat").upsert({
+                "id": WORKER_ID,
+                "last_heartbeat": datetime.now(timezone.utc).isoformat(),
+                "skyvern_healthy": stats["skyvern_ok"],
+                "poll_cycle": stats["poll_cycle"],
+                "applications_processed": stats["processed"],
+                "hostname": socket.gethostname(),
+                "location": WORKER_LOCATION
+            }).execute)
+        except Exception:
+            pass  # Non-critical
+
+
+_realtime_client = None  # keep a reference so the Realtime socket stays open
+
+
+async def start_applications_listener(wake: asyncio.Event) -> bool:
+    """Subscribe to Supabase Realtime changes on `applications`.
+
+    Sets `wake` whenever a row enters 'sending'/'approved' so the main loop
+    claims it immediately instead of waiting for the next poll.
+    Returns False if Realtime is unavailable (worker falls back to polling).
+    """
+    global _realtime_client
+    try:
+        from supabase import acreate_client
+        _realtime_client = await acreate_client(SUPABASE_URL, SUPABASE_KEY)
+
+        def _on_change(payload):
+            data = payload.get("data", payload) if isinstance(payload, dict) else {}
+            record = data.get("record") or data.get("new") or {}
+            if record.get("status") in ("sending", "approved") and not record.get("worker_id"):
+                wake.set()
+
+        channel = _realtime_client.channel("worker-applications")
+        channel.on_postgres_changes("*", schema="public", table="applications", callback=_on_change)
+        await channel.subscribe()
+        return True
+    except Exception as e:
+        await log(f"⚠️ Realtime subscription failed, using polling only: {e}")
+        return False
+
+
 async def main():
     await log("🌉 Skyvern Bridge started")
 
@@ -5565,13 +5971,14 @@ async def main():
 
     # Write startup heartbeat
     try:
+        now_iso = datetime.now(timezone.utc).isoformat()
         supabase.table("worker_heartbeat").upsert({
             "id": WORKER_ID,
-            "last_heartbeat": datetime.now(timezone.utc).isoformat(),
+            "last_heartbeat": now_iso,
             "skyvern_healthy": skyvern_ok,
             "poll_cycle": 0,
             "applications_processed": 0,
-            "started_at": datetime.now(timezone.utc).isoformat(),
+            "started_at": now_iso,
             "hostname": socket.gethostname(),
             "location": WORKER_LOCATION
         }).execute()
@@ -5579,33 +5986,65 @@ async def main():
     except Exception as e:
         await log(f"⚠️ Heartbeat write failed: {e}")
 
-    # Cleanup stuck applications on startup
+    # Cleanup stuck applications on startup, then periodically in the background
     await cleanup_stuck_applications()
+    _background_tasks.add(asyncio.create_task(cleanup_stuck_applications_loop()))
 
     # Cleanup stale Skyvern tasks (from previous worker sessions)
     await cleanup_stale_skyvern_tasks()
 
-    await log(f"📡 Polling every {POLL_INTERVAL} seconds for new applications...")
+    wake = asyncio.Event()
+    realtime_ok = await start_applications_listener(wake)
+    if realtime_ok:
+        await log(f"📡 Realtime: listening for new applications (reconcile every {RECONCILE_INTERVAL}s)")
+    else:
+        await log(f"📡 Polling every {POLL_INTERVAL} seconds for new applications...")
     await log(f"🔀 Parallel: up to {MAX_CONCURRENT_USERS} users concurrently")
 
     await print_startup_summary()
 
     poll_cycle = 0
     total_processed = 0
+    # Periodic jobs run on monotonic deadlines, not cycle counts: Realtime wakes
+    # shorten cycles, so counting them would run these faster during bursts
+    started = time.monotonic()
+    next_run = {
+        "reconcile": started + RECONCILE_INTERVAL,
+        "ping": started + SKYVERN_PING_INTERVAL,
+        "task_cleanup": started + SKYVERN_TASK_CLEANUP_INTERVAL / 2,  # offset from startup cleanup
+        "linkedin": started + 3600,  # offset to not conflict with other tasks
+    }
+
+    def due(job: str, interval: float) -> bool:
+        now = time.monotonic()
+        if now < next_run[job]:
+            return False
+        next_run[job] = now + interval
+        return True
+
+    stats = {"poll_cycle": 0, "processed": 0, "skyvern_ok": skyvern_ok}
+    _background_tasks.add(asyncio.create_task(heartbeat_loop(stats)))
     while True:
         try:
-            # Periodic cleanup of stuck applications
             poll_cycle += 1
-            if poll_cycle % CLEANUP_EVERY_N_CYCLES == 0:
-                await cleanup_stuck_applications()
 
-            # Atomically claim applications (optimistic locking — prevents duplicate processing)
-            response = supabase.rpc("claim_applications", {
-                "p_worker_id": WORKER_ID,
-                "p_limit": 10
-            }).execute()
+            # With Realtime, only claim when notified (plus a periodic reconcile sweep)
+            should_claim = (
+                not realtime_ok
+                or wake.is_set()
+                or due("reconcile", RECONCILE_INTERVAL)
+            )
+            wake.clear()
 
-            if response.data:
+            # Atomically claim applications (optimistic locking — prevents duplicate processing)
+            response = None
+            if should_claim:
+                response = supabase.rpc("claim_applications", {
+                    "p_worker_id": WORKER_ID,
+                    "p_limit": CLAIM_BATCH_SIZE
+                }).select(CLAIM_COLUMNS).execute()
+
+            if response and response.data:
                 count = len(response.data)
                 user_groups = group_applications_by_user(response.data)
                 user_count = len(user_groups)
@@ -5625,21 +6064,28 @@ async def main():
                     elif isinstance(result, int):
                         total_processed += result
 
+                # Full batch — there may be more waiting, claim again right away
+                if count >= CLAIM_BATCH_SIZE:
+                    wake.set()
+
         except Exception as e:
             await log(f"⚠️ Error: {e}")
 
-        # Periodic Skyvern health check + HF keepalive (every ~5 min)
-        # HF Spaces sleeps after 15 min inactivity, so ping every 5 min
-        if poll_cycle % 30 == 0:
+        # Skyvern availability is tracked by the circuit breaker (probes only while open).
+        # Still ping every ~5 min when needed as HF keepalive (HF Spaces sleep after
+        # 15 min inactivity) or to restore the primary after a failover.
+        needs_ping = "hf.space" in SKYVERN_PRIMARY_URL or SKYVERN_URL != SKYVERN_PRIMARY_URL
+        if needs_ping and not skyvern_breaker.is_open and due("ping", SKYVERN_PING_INTERVAL):
             skyvern_ok = await check_skyvern_health()
+        else:
+            skyvern_ok = not skyvern_breaker.is_open
 
-        # Periodic Skyvern task cleanup (every ~30 min = 180 cycles * 10s)
-        if poll_cycle % 180 == 90:
+        # Periodic Skyvern task cleanup (every 30 min)
+        if due("task_cleanup", SKYVERN_TASK_CLEANUP_INTERVAL):
             await cleanup_stale_skyvern_tasks()
 
         # LinkedIn scanning (once per day, from local machine — Edge Functions blocked by LinkedIn)
-        # 8640 cycles * 10s = 24 hours
-        if poll_cycle % 8640 == 360:  # offset to not conflict with other tasks
+        if due("linkedin", LINKEDIN_SCAN_INTERVAL):
             try:
                 from linkedin_scraper import scan_all_users
                 await log("🟣 Running LinkedIn scan from local worker...")
@@ -5647,22 +6093,25 @@ async def main():
             except Exception as e:
                 await log(f"⚠️ LinkedIn scan error: {e}")
 
-        # Write heartbeat
+        # Heartbeat is written by heartbeat_loop
+        stats.update(poll_cycle=poll_cycle, processed=total_processed, skyvern_ok=skyvern_ok)
+
         try:
-            supabase.table("worker_heartbeat").upsert({
-                "id": WORKER_ID,
-                "last_heartbeat": datetime.now(timezone.utc).isoformat(),
-                "skyvern_healthy": skyvern_ok,
-                "poll_cycle": poll_cycle,
-                "applications_processed": total_processed,
-                "hostname": socket.gethostname(),
-                "location": WORKER_LOCATION
-            }).execute()
-        except Exception:
-            pass  # Non-critical
+            await asyncio.wait_for(wake.wait(), timeout=POLL_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
 
-        await asyncio.sleep(POLL_INTERVAL)
+
+async def run_worker():
+    try:
+        await main()
+    finally:
+        for task in _background_tasks:
+            task.cancel()
+        await asyncio.gather(*_background_tasks, return_exceptions=True)
+        _background_tasks.clear()
+        await close_http_clients()
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    asyncio.run(run_worker())
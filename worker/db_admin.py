@@ -10,9 +10,9 @@ Usage:
 
 import os
 import sys
-import json
 import argparse
 import httpx
+import orjson
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -21,6 +21,24 @@ load_dotenv()
 SUPABASE_URL = os.getenv("SUPABASE_URL", "https://ptrmidlhfdbybxmyovtm.supabase.co")
 SERVICE_KEY = os.getenv("SUPABASE_SERVICE_KEY", "")
 
+# Shared keep-alive client: repeated execute_sql calls reuse one TLS connection
+_client: httpx.Client | None = None
+
+
+def get_client() -> httpx.Client:
+    """Return the shared httpx client (created on first use)."""
+    global _client
+    if _client is None:
+        _client = httpx.Client(
+            timeout=60.0,
+            headers={
+                "Authorization": f"Bearer {SERVICE_KEY}",
+                "Content-Type": "application/json",
+            },
+            limits=httpx.Limits(max_keepalive_connections=4),
+        )
+    return _client
+
 
 def execute_sql(sql: str, verbose: bool = False) -> dict:
     """Execute SQL via db-admin Edge Function."""
@@ -29,10 +47,6 @@ def execute_sql(sql: str, verbose: bool = False) -> dict:
         sys.exit(1)
 
     url = f"{SUPABASE_URL}/functions/v1/db-admin"
-    headers = {
-        "Authorization": f"Bearer {SERVICE_KEY}",
-        "Content-Type": "application/json",
-    }
 
     if verbose:
         print(f"Executing SQL ({len(sql)} chars)...")
@@ -42,8 +56,8 @@ def execute_sql(sql: str, verbose: bool = False) -> dict:
             print(f"SQL: {sql[:200]}... (truncated)")
 
     try:
-        response = httpx.post(url, json={"sql": sql}, headers=headers, timeout=60.0)
-        result = response.json()
+        response = get_client().post(url, content=orjson.dumps({"sql": sql}))
+        result = orjson.loads(response.content)
 
         if verbose:
             print(f"Status: {response.status_code}")
@@ -51,7 +65,7 @@ def execute_sql(sql: str, verbose: bool = False) -> dict:
         return result
     except httpx.RequestError as e:
         return {"success": False, "error": f"Request failed: {e}"}
-    except json.JSONDecodeError:
+    except orjson.JSONDecodeError:
         return {"success": False, "error": f"Invalid JSON response: {response.text}"}
 
 
@@ -61,16 +75,18 @@ def read_sql_file(filepath: str) -> str:
         return f.read()
 
 
-def show_rls_policies():
-    """Show current RLS policies for main tables."""
-    sql = """
+_RLS_POLICIES_SQL = """
     SELECT tablename, policyname, cmd, qual::text
     FROM pg_policies
     WHERE schemaname = 'public'
     AND tablename IN ('jobs', 'applications', 'cv_profiles', 'user_settings')
     ORDER BY tablename, policyname;
     """
-    result = execute_sql(sql)
+
+
+def show_rls_policies():
+    """Show current RLS policies for main tables."""
+    result = execute_sql(_RLS_POLICIES_SQL)
 
     if result.get("success"):
         rows = result.get("rows", [])
@@ -110,6 +126,7 @@ def main():
         return
 
     if args.file:
+        # Whole file in one request: exec_sql runs it as a single transaction
         sql = read_sql_file(args.file)
     elif args.sql:
         sql = args.sql
@@ -118,7 +135,11 @@ def main():
         return
 
     result = execute_sql(sql, verbose=args.verbose)
+    print_result(result)
+
 
+def print_result(result: dict):
+    """Print a db-admin result."""
     if result.get("success"):
         rows = result.get("rows", [])
         row_count = result.get("rowCount", 0)
@@ -130,7 +151,7 @@ def main():
             print(f"\nResults ({len(rows)} rows):")
             print("-" * 60)
             for i, row in enumerate(rows[:20]):  # Limit to 20 rows
-                print(json.dumps(row, indent=2, default=str))
+                print(orjson.dumps(row, option=orjson.OPT_INDENT_2, default=str).decode())
                 if i < len(rows) - 1:
                     print()
             if len(rows) > 20:
@@ -10,12 +10,20 @@ Usage:
 """
 
 import asyncio
+import hashlib
+import hmac
+import logging
 import sys
 import os
-import json
+import random
 import re
+import textwrap
+import time
 import httpx
-from datetime import datetime
+import orjson
+from collections import OrderedDict
+from html import unescape
+from urllib.parse import parse_qsl, urlencode, urlsplit
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -24,48 +32,31 @@ load_dotenv()
 # --- CONFIGURATION ---
 SKYVERN_URL = os.getenv("SKYVERN_API_URL", "http://localhost:8000")
 SKYVERN_API_KEY = os.getenv("SKYVERN_API_KEY", "")
+# Optional push notifications: public URL Skyvern can POST to, e.g. http://my-host:8787/skyvern/callback
+SKYVERN_WEBHOOK_URL = os.getenv("SKYVERN_WEBHOOK_URL", "")
+SKYVERN_WEBHOOK_HOST = os.getenv("SKYVERN_WEBHOOK_HOST", "127.0.0.1")  # 0.0.0.0 if Skyvern runs elsewhere
+SKYVERN_WEBHOOK_PORT = int(os.getenv("SKYVERN_WEBHOOK_PORT", "8787"))
+SKYVERN_WEBHOOK_SECRET = os.getenv("SKYVERN_WEBHOOK_SECRET", "")  # expected as ?token= on the callback URL
+WEBHOOK_MAX_BODY = 1024 * 1024  # largest callback body accepted (bytes)
+WEBHOOK_READ_TIMEOUT = 10.0  # seconds to receive a whole callback request
+WEBHOOK_FALLBACK_POLL = 30.0  # safety-net poll interval (s) while waiting for a webhook
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
-
-def log(msg: str):
-    """Simple logging with timestamp."""
-    timestamp = datetime.now().strftime("%H:%M:%S")
-    print(f"[{timestamp}] {msg}")
-
-
-async def check_skyvern_health() -> bool:
-    """Check if Skyvern is running by calling the tasks endpoint with auth."""
-    try:
-        headers = {}
-        if SKYVERN_API_KEY:
-            headers["x-api-key"] = SKYVERN_API_KEY
-
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{SKYVERN_URL}/api/v1/tasks",
-                headers=headers,
-                timeout=5.0
-            )
-            return response.status_code == 200
-    except Exception:
-        return False
-
-
-async def extract_apply_url_skyvern(job_url: str, source: str = "FINN") -> dict:
-    """
-    Uses Skyvern to click on apply button and extract the final URL.
-
-    Args:
-        job_url: The job listing URL (FINN.no or NAV.no)
-        source: "FINN" or "NAV"
-
-    Returns:
-        dict with keys: success, external_url, form_type, error
-    """
-
-    # Define navigation goal based on source
-    if source == "NAV" or "nav.no" in job_url.lower():
-        navigation_goal = """
+POLL_INITIAL_DELAY = 1.0  # first task-status poll delay (s)
+POLL_BACKOFF_RATE = 1.7  # delay multiplier per poll while the status is unchanged
+POLL_MAX_DELAY = 15.0  # cap for the task-status poll delay (s)
+DAEMON_POLL_INTERVAL = 30  # poll interval (s) when Realtime is unavailable
+DAEMON_BACKUP_POLL_INTERVAL = 300  # safety-net poll (s) with Realtime (missed events, retries)
+SKYVERN_BREAKER_THRESHOLD = 3  # consecutive connect errors before the daemon pauses
+SKYVERN_BREAKER_MAX_PAUSE = 60  # max daemon pause (s) while Skyvern is unreachable
+STEPS_SCAN_LIMIT = 5  # trailing task steps searched for an apply URL
+PROCESSED_IDS_MAX = 20000  # daemon remembers at most this many processed job ids
+SKYVERN_CONCURRENCY = int(os.getenv("SKYVERN_CONCURRENCY", "5"))  # parallel Skyvern tasks in daemon mode
+RESULT_CACHE_TTL = 3600  # reuse a successful extraction for the same URL this long (s)
+RESULT_CACHE_MAX = 512  # cached extraction results kept in memory
+
+# --- SKYVERN TASK DEFINITIONS (built once, shared by every task) ---
+_NAV_GOAL = textwrap.dedent("""
         GOAL: Extract the COMPLETE href URL from the apply button, including ALL query parameters.
 
         STEP 1: Handle any cookie popup by clicking "Godta" or "Aksepter".
@@ -87,9 +78,9 @@ async def extract_apply_url_skyvern(job_url: str, source: str = "FINN") -> dict:
         - Do NOT report just the domain (https://site.com) - we need the FULL path and query
         - If no href, click the button and report the final browser URL as 'final_browser_url'
         - DO NOT fill any forms!
-        """
-    else:  # FINN
-        navigation_goal = """
+        """).strip()
+
+_FINN_GOAL = textwrap.dedent("""
         GOAL: Determine if this is FINN Enkel Søknad (internal) or external application, and extract URL if external.
 
         STEP 1: Handle Schibsted/FINN cookie popup - click "Godta alle" or "Aksepter".
@@ -120,78 +111,205 @@ async def extract_apply_url_skyvern(job_url: str, source: str = "FINN") -> dict:
         - NEVER report search/filter URLs (finn.no/job/search, finn.no/job/fulltime)
         - If mailto: link, extract the email address
         - DO NOT fill any forms!
-        """
-
-    # Data extraction schema - prioritize complete href with query params
-    data_extraction_schema = {
-        "type": "object",
-        "properties": {
-            "application_url": {
-                "type": "string",
-                "description": "The COMPLETE href URL from the apply button INCLUDING all query parameters. Example: https://employer.com/apply?job=123&ref=nav.no"
-            },
-            "final_browser_url": {
-                "type": "string",
-                "description": "If button has no href, the browser URL after clicking (with all query params)"
-            },
-            "email_address": {
-                "type": "string",
-                "description": "If mailto: link, the email address"
-            },
-            "button_text": {
-                "type": "string",
-                "description": "The visible text on the apply button"
-            },
-            "is_finn_internal": {
-                "type": "boolean",
-                "description": "True if button text is 'Enkel søknad'"
-            }
+        """).strip()
+
+# Data extraction schema - prioritize complete href with query params
+_EXTRACTION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "application_url": {
+            "type": "string",
+            "description": "The COMPLETE href URL from the apply button INCLUDING all query parameters. Example: https://employer.com/apply?job=123&ref=nav.no"
+        },
+        "final_browser_url": {
+            "type": "string",
+            "description": "If button has no href, the browser URL after clicking (with all query params)"
+        },
+        "email_address": {
+            "type": "string",
+            "description": "If mailto: link, the email address"
+        },
+        "button_text": {
+            "type": "string",
+            "description": "The visible text on the apply button"
+        },
+        "is_finn_internal": {
+            "type": "boolean",
+            "description": "True if button text is 'Enkel søknad'"
         }
     }
+}
+
+_EXTRACTION_GOAL = "Extract the COMPLETE href attribute from the apply button, including ALL query parameters (?param=value&...). Report as 'application_url'. If no href exists, click and report 'final_browser_url'."
+
+# Task fields shared by every extraction (url, goal and webhook are added per task)
+_BASE_PAYLOAD = {
+    "data_extraction_goal": _EXTRACTION_GOAL,
+    "data_extraction_schema": _EXTRACTION_SCHEMA,
+    "max_steps": 12,
+    "proxy_location": "RESIDENTIAL",
+}
+
+_SKYVERN_HEADERS = {"Content-Type": "application/json"}
+if SKYVERN_API_KEY:
+    _SKYVERN_HEADERS["x-api-key"] = SKYVERN_API_KEY
+
+# Shared keep-alive HTTP client (created lazily inside the running event loop)
+_client: httpx.AsyncClient | None = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """Return the shared AsyncClient, creating it on first use."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            http2=True,  # multiplex concurrent Skyvern polls over one TLS connection
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=30.0),
+            timeout=httpx.Timeout(30.0, connect=5.0),  # fail fast when Skyvern is down
+        )
+    return _client
+
+
+async def close_client():
+    """Close the shared AsyncClient (call on shutdown)."""
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+
+
+_logger = logging.getLogger("extract_apply_url")
+_logger.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+_log_handler = logging.StreamHandler(sys.stdout)
+_log_handler.setFormatter(logging.Formatter("[%(asctime)s] %(message)s", datefmt="%H:%M:%S"))
+_logger.addHandler(_log_handler)
+_logger.propagate = False
+
+
+def log(msg: str, level: int = logging.INFO):
+    """Simple logging with timestamp (per-poll details go at DEBUG; LOG_LEVEL=DEBUG shows them)."""
+    _logger.log(level, msg)
+
+
+async def check_skyvern_health() -> bool:
+    """Check if Skyvern is running by calling the tasks endpoint with auth."""
+    try:
+        response = await get_client().get(
+            f"{SKYVERN_URL}/api/v1/tasks",
+            headers=_SKYVERN_HEADERS,
+            timeout=5.0
+        )
+        return response.status_code == 200
+    except Exception:
+        return False
+
+
+# Consecutive Skyvern connect errors (task create); the daemon pauses when it trips
+_skyvern_breaker = {"connect_failures": 0}
+
+# In-flight Skyvern extractions by job_url: the same URL can belong to several
+# users' jobs, concurrent requests for it share one Skyvern task and poll loop
+_inflight: dict[str, asyncio.Task] = {}
+
+# Recent successful extractions: normalized job_url -> (monotonic time, result), oldest first
+_result_cache: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+
+
+def _url_cache_key(job_url: str) -> str:
+    """
+    Normalize job_url for deduplication: drop the fragment, utm_* tracking
+    parameters and trailing slash, and lowercase. finnkode and other real
+    query parameters are kept.
+    """
+    parts = urlsplit(job_url.lower())
+    query = urlencode([(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                       if not k.startswith("utm_")])
+    return f"{parts.scheme}://{parts.netloc}{parts.path.rstrip('/')}" + (f"?{query}" if query else "")
+
+
+async def extract_apply_url_skyvern(job_url: str, source: str = "FINN") -> dict:
+    """
+    Uses Skyvern to click on apply button and extract the final URL.
+    Concurrent calls for the same job_url share a single Skyvern task, and
+    successful results are reused for RESULT_CACHE_TTL seconds.
+
+    Args:
+        job_url: The job listing URL (FINN.no or NAV.no)
+        source: "FINN" or "NAV"
+
+    Returns:
+        dict with keys: success, external_url, form_type, error
+    """
+    key = _url_cache_key(job_url)
+    cached = _result_cache.get(key)
+    if cached and time.monotonic() - cached[0] < RESULT_CACHE_TTL:
+        log(f"♻️ Reusing cached Skyvern result for: {job_url}")
+        return cached[1]
+
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.create_task(_extract_apply_url_skyvern(job_url, source))
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    else:
+        log(f"🔁 Reusing in-flight Skyvern task for: {job_url}")
+    # shield: a cancelled caller must not cancel the task other callers wait on
+    result = await asyncio.shield(task)
+
+    if result.get("success"):
+        _result_cache[key] = (time.monotonic(), result)
+        _result_cache.move_to_end(key)
+        while len(_result_cache) > RESULT_CACHE_MAX:
+            _result_cache.popitem(last=False)
+    return result
+
+
+async def _extract_apply_url_skyvern(job_url: str, source: str) -> dict:
+    """Create the Skyvern task for job_url and wait for its result."""
+
+    # Define navigation goal based on source
+    if source == "NAV" or "nav.no" in job_url.lower():
+        navigation_goal = _NAV_GOAL
+    else:  # FINN
+        navigation_goal = _FINN_GOAL
 
     payload = {
+        **_BASE_PAYLOAD,
         "url": job_url,
-        "webhook_callback_url": None,
+        "webhook_callback_url": SKYVERN_WEBHOOK_URL if _webhook_server is not None else None,
         "navigation_goal": navigation_goal,
-        "data_extraction_goal": "Extract the COMPLETE href attribute from the apply button, including ALL query parameters (?param=value&...). Report as 'application_url'. If no href exists, click and report 'final_browser_url'.",
-        "data_extraction_schema": data_extraction_schema,
-        "max_steps": 12,
-        "proxy_location": "RESIDENTIAL"
     }
 
-    headers = {"Content-Type": "application/json"}
-    if SKYVERN_API_KEY:
-        headers["x-api-key"] = SKYVERN_API_KEY
-
     try:
-        async with httpx.AsyncClient() as client:
-            log(f"🚀 Sending task to Skyvern for: {job_url}")
+        log(f"🚀 Sending task to Skyvern for: {job_url}")
 
-            # Create task
-            response = await client.post(
-                f"{SKYVERN_URL}/api/v1/tasks",
-                json=payload,
-                headers=headers,
-                timeout=30.0
-            )
+        # Create task
+        response = await get_client().post(
+            f"{SKYVERN_URL}/api/v1/tasks",
+            content=orjson.dumps(payload),
+            headers=_SKYVERN_HEADERS,
+            timeout=30.0
+        )
 
-            if response.status_code != 200:
-                return {
-                    "success": False,
-                    "error": f"Skyvern API error: {response.text}"
-                }
+        _skyvern_breaker["connect_failures"] = 0
+
+        if response.status_code != 200:
+            return {
+                "success": False,
+                "error": f"Skyvern API error: {response.text}"
+            }
 
-            task_data = response.json()
-            task_id = task_data.get("task_id")
-            log(f"✅ Task created: {task_id}")
+        task_data = orjson.loads(response.content)
+        task_id = task_data.get("task_id")
+        log(f"✅ Task created: {task_id}")
 
-            # Poll for completion
-            result = await wait_for_task_completion(client, task_id, headers, job_url=job_url)
-            return result
+        # Poll for completion
+        result = await wait_for_task_completion(task_id, _SKYVERN_HEADERS, job_url=job_url)
+        return result
 
     except httpx.ConnectError:
+        _skyvern_breaker["connect_failures"] += 1
         return {
             "success": False,
+            "retryable": True,  # Skyvern down - not the job's fault
             "error": "Cannot connect to Skyvern. Is it running on localhost:8000?"
         }
     except Exception as e:
@@ -201,14 +319,195 @@ async def extract_apply_url_skyvern(job_url: str, source: str = "FINN") -> dict:
         }
 
 
-async def wait_for_task_completion(client: httpx.AsyncClient, task_id: str, headers: dict, timeout_seconds: int = 180, job_url: str = "") -> dict:
+# Field aliases Skyvern's extractor has used for each value, in priority order
+_EXTRACTED_ALIASES = {
+    "final_url": (
+        "application_url", "applicationUrl",            # href attribute (preferred)
+        "final_browser_url", "finalBrowserUrl",        # fallback if no href
+        "current_page_url", "currentPageUrl", "final_url", "href",
+    ),
+    "email_link": ("email_address", "emailAddress", "email_link", "email"),
+    "button_text": ("button_text", "buttonText"),
+    "is_finn_internal": ("is_finn_internal", "isFinnInternal", "isFinnEnkelSoknad"),
+}
+
+
+# alias -> (field, priority) so the payload is mapped in a single pass
+_EXTRACTED_ALIAS_SLOTS = {
+    alias: (field, rank)
+    for field, aliases in _EXTRACTED_ALIASES.items()
+    for rank, alias in enumerate(aliases)
+}
+_EXTRACTED_DEFAULTS = {"final_url": "", "email_link": "", "button_text": "", "is_finn_internal": False}
+
+
+def pick_extracted(extracted_data: dict) -> dict:
+    """
+    Map Skyvern's extracted_information onto our field names in one pass over it;
+    for each field the highest-priority truthy alias wins.
+    """
+    picked = dict(_EXTRACTED_DEFAULTS)
+    ranks = {}
+    for key, val in extracted_data.items():
+        slot = _EXTRACTED_ALIAS_SLOTS.get(key)
+        if slot and val and slot[1] < ranks.get(slot[0], len(_EXTRACTED_ALIASES[slot[0]])):
+            picked[slot[0]] = val
+            ranks[slot[0]] = slot[1]
+    return picked
+
+
+# --- SKYVERN WEBHOOK RECEIVER (optional, enabled by SKYVERN_WEBHOOK_URL) ---
+_webhook_server: asyncio.AbstractServer | None = None
+_task_events: dict[str, asyncio.Event] = {}  # task_id -> set when Skyvern calls back
+
+
+def _webhook_authorized(path: str, headers: dict, body: bytes) -> bool:
+    """
+    Accept a callback carrying our shared secret (?token=SKYVERN_WEBHOOK_SECRET)
+    or Skyvern's signature (x-skyvern-signature: HMAC-SHA256 of the body keyed
+    with SKYVERN_API_KEY).
+    """
+    if SKYVERN_WEBHOOK_SECRET:
+        token = dict(parse_qsl(urlsplit(path).query)).get("token", "")
+        if hmac.compare_digest(token, SKYVERN_WEBHOOK_SECRET):
+            return True
+    signature = headers.get("x-skyvern-signature", "")
+    if SKYVERN_API_KEY and signature:
+        expected = hmac.new(SKYVERN_API_KEY.encode(), body, hashlib.sha256).hexdigest()
+        return hmac.compare_digest(signature, expected)
+    return False
+
+
+async def _read_webhook_request(reader: asyncio.StreamReader) -> tuple[str, dict, bytes] | int:
+    """Read one callback request: (path, headers, body), or an HTTP error status."""
+    request_line = await reader.readline()
+    parts = request_line.decode("latin-1").split()
+    if len(parts) < 2 or parts[0] != "POST":
+        return 405
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        if len(headers) >= 100:
+            return 431
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get("content-length", "0"))
+    except ValueError:
+        return 400
+    if length < 0 or length > WEBHOOK_MAX_BODY:
+        return 413
+    body = await reader.readexactly(length) if length else b""
+    return parts[1], headers, body
+
+
+async def _handle_webhook(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    """
+    Minimal HTTP handler for Skyvern's task callback.
+    It only wakes the matching poller, which then fetches the task itself,
+    so even an accepted callback can at most trigger one extra status GET.
+    """
+    status = 200
+    try:
+        request = await asyncio.wait_for(_read_webhook_request(reader), timeout=WEBHOOK_READ_TIMEOUT)
+        if isinstance(request, int):
+            status = request
+        else:
+            path, headers, body = request
+            if not _webhook_authorized(path, headers, body):
+                status = 401
+            else:
+                task_id = orjson.loads(body).get("task_id") if body else None
+                event = _task_events.get(task_id)
+                if event is not None:
+                    event.set()
+    except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+        status = 400
+    except Exception as e:
+        log(f"⚠️ Webhook error: {e}")
+        status = 500
+    try:
+        writer.write(f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+                     "Content-Length: 0\r\nConnection: close\r\n\r\n".encode())
+        await writer.drain()
+    except Exception:
+        pass
+    finally:
+        writer.close()
+
+
+async def start_webhook_server() -> bool:
+    """Start the callback receiver if SKYVERN_WEBHOOK_URL is configured."""
+    global _webhook_server
+    if not SKYVERN_WEBHOOK_URL:
+        return False
+    if not (SKYVERN_WEBHOOK_SECRET or SKYVERN_API_KEY):
+        log("⚠️ SKYVERN_WEBHOOK_URL needs SKYVERN_WEBHOOK_SECRET or SKYVERN_API_KEY to verify callbacks; polling only")
+        return False
+    try:
+        _webhook_server = await asyncio.start_server(
+            _handle_webhook, SKYVERN_WEBHOOK_HOST, SKYVERN_WEBHOOK_PORT
+        )
+        return True
+    except OSError as e:
+        log(f"⚠️ Webhook receiver failed to start, polling only: {e}")
+        return False
+
+
+async def stop_webhook_server():
+    """Stop the callback receiver (call on shutdown)."""
+    if _webhook_server is not None:
+        _webhook_server.close()
+        await _webhook_server.wait_closed()
+
+
+async def wait_for_task_completion(task_id: str, headers: dict, timeout_seconds: int = 180, job_url: str = "") -> dict:
     """
     Polls Skyvern task status until completion.
+    With the webhook receiver running, the task's callback triggers the next poll
+    immediately and the timed polls are only a slow safety net.
     """
-    start_time = datetime.now()
+    if _webhook_server is None:
+        return await _poll_task_completion(task_id, headers, timeout_seconds, job_url)
+
+    _task_events[task_id] = asyncio.Event()
+    try:
+        return await _poll_task_completion(task_id, headers, timeout_seconds, job_url)
+    finally:
+        _task_events.pop(task_id, None)
+
+
+async def _poll_task_completion(task_id: str, headers: dict, timeout_seconds: int, job_url: str) -> dict:
+    """Poll /api/v1/tasks/{task_id} until the task finishes or times out."""
+    client = get_client()
+    start_time = time.monotonic()
+    attempt = 0
+    last_status = None
+
+    async def backoff(retry_after: str | None = None):
+        # Exponential backoff with full jitter: catches fast tasks early, polls long
+        # ones rarely, and keeps concurrent pollers from hitting Skyvern in lockstep
+        nonlocal attempt
+        if retry_after and retry_after.isdigit():
+            await asyncio.sleep(min(int(retry_after), timeout_seconds))
+            return
+        done = _task_events.get(task_id)
+        if done is not None:
+            # Webhook mode: wait for Skyvern's callback, poll anyway every WEBHOOK_FALLBACK_POLL
+            try:
+                await asyncio.wait_for(done.wait(), timeout=WEBHOOK_FALLBACK_POLL)
+            except asyncio.TimeoutError:
+                pass
+            done.clear()
+            return
+        delay = min(POLL_MAX_DELAY, POLL_INITIAL_DELAY * POLL_BACKOFF_RATE ** attempt)
+        attempt += 1
+        await asyncio.sleep(random.uniform(delay * 0.5, delay))
 
     while True:
-        elapsed = (datetime.now() - start_time).total_seconds()
+        elapsed = time.monotonic() - start_time
         if elapsed > timeout_seconds:
             return {
                 "success": False,
@@ -222,63 +521,71 @@ async def wait_for_task_completion(client: httpx.AsyncClient, task_id: str, head
                 timeout=10.0
             )
 
+            if response.status_code in (401, 403):
+                # Bad/missing SKYVERN_API_KEY won't fix itself: don't poll out the full timeout
+                return {
+                    "success": False,
+                    "error": f"Skyvern rejected the task status request (HTTP {response.status_code})"
+                }
             if response.status_code != 200:
-                await asyncio.sleep(3)
+                # Skyvern overloaded: honour its Retry-After before our own backoff
+                if response.status_code in (429, 503):
+                    await backoff(response.headers.get("Retry-After"))
+                else:
+                    await backoff()
                 continue
 
-            data = response.json()
+            data = orjson.loads(response.content)
             status = data.get("status", "").lower()
 
-            log(f"⏳ Task status: {status}")
+            # Status moved on (e.g. queued → running): log it and poll quickly again
+            if status != last_status:
+                log(f"⏳ Task status: {status}")
+                attempt = 0
+                last_status = status
+            else:
+                log(f"⏳ Task status: {status}", logging.DEBUG)
 
             if status == "completed":
-                # Log raw response for debugging
-                log(f"📦 Raw extracted_information: {data.get('extracted_information')}")
-                log(f"📦 Response keys: {list(data.keys())}")
-
-                # Check request data for URLs
-                request_data = data.get("request", {}) or {}
-                log(f"📦 Request URL (start): {request_data.get('url', 'N/A')}")
-
-                # Try to find final URL from recording_url (might contain domain info)
-                recording_url = data.get("recording_url", "")
-                if recording_url:
-                    log(f"🎬 Recording URL: {recording_url}")
-
-                # Try to find final URL from screenshot URL or other fields
-                screenshot_url = data.get("screenshot_url", "")
-                if screenshot_url:
-                    log(f"📸 Screenshot URL: {screenshot_url}")
-
-                # Check action_screenshot_urls for navigation clues
-                action_screenshots = data.get("action_screenshot_urls", []) or []
-                if action_screenshots:
-                    log(f"📸 Action screenshots count: {len(action_screenshots)}")
-                    # Last screenshot might be from final page
-                    if len(action_screenshots) > 0:
-                        last_screenshot = action_screenshots[-1]
-                        log(f"📸 Last action screenshot: {last_screenshot[:100] if last_screenshot else 'N/A'}...")
-
                 extracted_data = data.get("extracted_information", {}) or {}
 
-                # Log raw data for debugging query parameter issues
-                log(f"📦 Raw extracted data keys: {list(extracted_data.keys())}")
-                for key, val in extracted_data.items():
-                    if val:
-                        log(f"   {key}: {str(val)[:100]}...")
+                # Diagnostics only: skip building these strings unless LOG_LEVEL=DEBUG
+                if _logger.isEnabledFor(logging.DEBUG):
+                    log(f"📦 Raw extracted_information: {data.get('extracted_information')}", logging.DEBUG)
+                    log(f"📦 Response keys: {list(data.keys())}", logging.DEBUG)
+
+                    # Check request data for URLs
+                    request_data = data.get("request", {}) or {}
+                    log(f"📦 Request URL (start): {request_data.get('url', 'N/A')}", logging.DEBUG)
+
+                    # Try to find final URL from recording_url (might contain domain info)
+                    recording_url = data.get("recording_url", "")
+                    if recording_url:
+                        log(f"🎬 Recording URL: {recording_url}", logging.DEBUG)
+
+                    # Try to find final URL from screenshot URL or other fields
+                    screenshot_url = data.get("screenshot_url", "")
+                    if screenshot_url:
+                        log(f"📸 Screenshot URL: {screenshot_url}", logging.DEBUG)
+
+                    # Check action_screenshot_urls for navigation clues
+                    action_screenshots = data.get("action_screenshot_urls", []) or []
+                    if action_screenshots:
+                        log(f"📸 Action screenshots count: {len(action_screenshots)}", logging.DEBUG)
+                        # Last screenshot might be from final page
+                        if len(action_screenshots) > 0:
+                            last_screenshot = action_screenshots[-1]
+                            log(f"📸 Last action screenshot: {last_screenshot[:100] if last_screenshot else 'N/A'}...", logging.DEBUG)
+
+                    # Log raw data for debugging query parameter issues
+                    log(f"📦 Raw extracted data keys: {list(extracted_data.keys())}", logging.DEBUG)
+                    for key, val in extracted_data.items():
+                        if val:
+                            log(f"   {key}: {str(val)[:100]}...", logging.DEBUG)
 
                 # Try multiple field names - prioritize application_url (href attribute)
-                final_url = (
-                    extracted_data.get("application_url", "") or
-                    extracted_data.get("applicationUrl", "") or
-                    extracted_data.get("final_browser_url", "") or  # Fallback if no href
-                    extracted_data.get("finalBrowserUrl", "") or
-                    extracted_data.get("current_page_url", "") or
-                    extracted_data.get("currentPageUrl", "") or
-                    extracted_data.get("final_url", "") or
-                    extracted_data.get("href", "") or
-                    ""
-                )
+                picked = pick_extracted(extracted_data)
+                final_url = picked["final_url"]
 
                 # Validate URL has query parameters
                 if final_url:
@@ -292,26 +599,14 @@ async def wait_for_task_completion(client: httpx.AsyncClient, task_id: str, head
                                 log(f"📎 Found URL with params in '{key}': {val}")
                                 final_url = val
                                 break
-                email_link = (
-                    extracted_data.get("email_address", "") or
-                    extracted_data.get("emailAddress", "") or
-                    extracted_data.get("email_link", "") or
-                    extracted_data.get("email", "") or
-                    ""
-                )
-                button_text = (
-                    extracted_data.get("button_text", "") or
-                    extracted_data.get("buttonText", "") or
-                    ""
-                )
-                is_finn_internal = (
-                    extracted_data.get("is_finn_internal", False) or
-                    extracted_data.get("isFinnInternal", False) or
-                    extracted_data.get("isFinnEnkelSoknad", False)
-                )
+                email_link = picked["email_link"]
+                button_text = picked["button_text"]
+                is_finn_internal = picked["is_finn_internal"]
 
                 # Also try to get URL from task steps API
-                if not final_url:
+                # (not for email / FINN internal: their apply URL ignores final_url)
+                is_enkel_button = bool(button_text) and "enkel søknad" in button_text.lower()
+                if not final_url and not email_link and not is_finn_internal and not is_enkel_button:
                     try:
                         # Fetch task steps to find navigation URLs
                         steps_response = await client.get(
@@ -320,12 +615,13 @@ async def wait_for_task_completion(client: httpx.AsyncClient, task_id: str, head
                             timeout=10.0
                         )
                         if steps_response.status_code == 200:
-                            steps_data = steps_response.json()
-                            log(f"📋 Steps count: {len(steps_data) if isinstance(steps_data, list) else 'N/A'}")
+                            steps_data = orjson.loads(steps_response.content)
+                            log(f"📋 Steps count: {len(steps_data) if isinstance(steps_data, list) else 'N/A'}", logging.DEBUG)
 
                             # Look through steps for navigation or click actions
                             if isinstance(steps_data, list):
-                                for step in reversed(steps_data):
+                                # The apply URL comes from the last navigation actions
+                                for step in reversed(steps_data[-STEPS_SCAN_LIMIT:]):
                                     step_output = step.get("output", {}) or {}
                                     action_results = step_output.get("action_results", []) or []
 
@@ -344,79 +640,34 @@ async def wait_for_task_completion(client: httpx.AsyncClient, task_id: str, head
                     except Exception as e:
                         log(f"⚠️ Could not fetch steps: {e}")
 
-                # Determine form type and apply URL
-                form_type = "unknown"
-                apply_url = final_url
-
-                if email_link:
-                    # Application is via email
-                    form_type = "email"
-                    apply_url = f"mailto:{email_link}" if not email_link.startswith("mailto:") else email_link
-                    log(f"📧 Email application: {email_link}")
-                elif is_finn_internal or (button_text and "enkel søknad" in button_text.lower()):
-                    # FINN Enkel Søknad - NO external URL needed
-                    form_type = "finn_easy"
-                    apply_url = None  # Clear any extracted URL
-                    log(f"✅ FINN Enkel Søknad detected - no external URL needed")
-                elif final_url:
-                    # Validate the URL before accepting it
-                    if is_valid_apply_url(final_url, job_url):
-                        form_type = detect_form_type_from_url(final_url)
-                        log(f"✅ Valid external URL: {final_url}")
-                    else:
-                        log(f"⚠️ Invalid URL rejected: {final_url}")
-                        apply_url = None
-                        form_type = "unknown"
-
-                log(f"📝 Button text: {button_text}")
-                log(f"🏷️ Form type: {form_type}")
-                log(f"🔗 Final apply URL: {apply_url}")
-
-                return {
-                    "success": True if (apply_url or form_type == "finn_easy") else False,
-                    "external_url": apply_url,
-                    "email": email_link if email_link else None,
-                    "button_text": button_text,
-                    "form_type": form_type,
-                    "task_id": task_id
-                }
+                return build_extraction_result(
+                    task_id, job_url, final_url, email_link, button_text, is_finn_internal
+                )
 
             elif status in ["failed", "terminated"]:
                 failure_reason = data.get("failure_reason", "Unknown error")
 
                 # Even terminated tasks might have extracted useful data
                 extracted_data = data.get("extracted_information", {}) or {}
-                email_link = extracted_data.get("email_link", "") or ""
-                final_url = extracted_data.get("final_url", "") or ""
+                picked = pick_extracted(extracted_data)
+                email_link = picked["email_link"]
 
                 # Check if we found email in the failure reason (Skyvern sometimes reports this way)
                 if "email" in failure_reason.lower() and "@" in failure_reason:
                     # Extract email from failure reason
-                    email_match = re.search(r'[\w\.-]+@[\w\.-]+\.\w+', failure_reason)
+                    email_match = _EMAIL_RE.search(failure_reason)
                     if email_match:
                         email_link = email_match.group(0)
                         log(f"📧 Found email in termination reason: {email_link}")
-                        return {
-                            "success": True,
-                            "external_url": f"mailto:{email_link}",
-                            "email": email_link,
-                            "button_text": "",
-                            "form_type": "email",
-                            "task_id": task_id
-                        }
 
                 # If we have extracted data, try to use it
-                if email_link or final_url:
-                    form_type = "email" if email_link else detect_form_type_from_url(final_url)
-                    apply_url = f"mailto:{email_link}" if email_link else final_url
-                    return {
-                        "success": True,
-                        "external_url": apply_url,
-                        "email": email_link if email_link else None,
-                        "button_text": extracted_data.get("button_text", ""),
-                        "form_type": form_type,
-                        "task_id": task_id
-                    }
+                # (is_finn_internal is left out: only a completed run's own FINN flag is trusted)
+                if email_link or picked["final_url"]:
+                    result = build_extraction_result(
+                        task_id, job_url, picked["final_url"], email_link, picked["button_text"]
+                    )
+                    if result["success"]:
+                        return result
 
                 return {
                     "success": False,
@@ -425,11 +676,23 @@ async def wait_for_task_completion(client: httpx.AsyncClient, task_id: str, head
                 }
 
             # Still running, wait and retry
-            await asyncio.sleep(3)
+            await backoff()
 
         except Exception as e:
             log(f"⚠️ Poll error: {e}")
-            await asyncio.sleep(3)
+            await backoff()
+
+
+# Invalid URL patterns - these are NOT apply URLs
+_INVALID_APPLY_URL_RE = re.compile("|".join(map(re.escape, [
+    'finn.no/job/search',      # Search page
+    'finn.no/job/fulltime',    # Filter/listing page (without finnkode)
+    'finn.no/job/parttime',    # Filter/listing page
+    'finn.no/jobb/',           # Old job listing format
+    '/search?',                # Search query
+    '/filter?',                # Filter query
+    'nav.no/stillinger',       # NAV search page (without specific job)
+])))
 
 
 def is_valid_apply_url(url: str, original_job_url: str = "") -> bool:
@@ -442,23 +705,10 @@ def is_valid_apply_url(url: str, original_job_url: str = "") -> bool:
 
     url_lower = url.lower()
 
-    # Invalid URL patterns - these are NOT apply URLs
-    invalid_patterns = [
-        'finn.no/job/search',      # Search page
-        'finn.no/job/fulltime',    # Filter/listing page (without finnkode)
-        'finn.no/job/parttime',    # Filter/listing page
-        'finn.no/jobb/',           # Old job listing format
-        '/search?',                # Search query
-        '/filter?',                # Filter query
-        'nav.no/stillinger',       # NAV search page (without specific job)
-    ]
-
-    for pattern in invalid_patterns:
-        if pattern in url_lower:
-            # Exception: if URL has finnkode parameter, it might be valid
-            if 'finnkode=' in url_lower:
-                continue
-            return False
+    # Search/filter pages are NOT apply URLs
+    # Exception: if URL has finnkode parameter, it might be valid
+    if _INVALID_APPLY_URL_RE.search(url_lower) and 'finnkode=' not in url_lower:
+        return False
 
     # Check if it's the same as original job URL (shouldn't extract same URL)
     if original_job_url and url_lower.strip('/') == original_job_url.lower().strip('/'):
@@ -473,32 +723,302 @@ def is_valid_apply_url(url: str, original_job_url: str = "") -> bool:
     return True
 
 
+# Email address in Skyvern's failure_reason (mailto-only listings)
+_EMAIL_RE = re.compile(r"\b[\w.\-]+@[\w.\-]+\.\w+\b")
+
+# Known recruitment systems that typically require registration
+_REGISTRATION_DOMAINS_RE = re.compile(
+    r"webcruiter|easycruit|teamtailor|lever\.co|greenhouse|workday|smartrecruiters|linkedin",
+    re.IGNORECASE,
+)
+
+
 def detect_form_type_from_url(url: str) -> str:
     """
     Detect form type based on the domain of the external URL.
     """
-    url_lower = url.lower()
+    # Known form-only systems (jobylon, recman, cvpartner, talenttech) fall through
+    # to the same default, so only the registration pattern needs a check
+    if _REGISTRATION_DOMAINS_RE.search(url):
+        return "external_registration"
+
+    return "external_form"  # Default to form if we got a URL
 
-    # Known recruitment systems that typically require registration
-    registration_domains = [
-        "webcruiter", "easycruit", "teamtailor", "lever.co",
-        "greenhouse", "workday", "smartrecruiters", "linkedin"
-    ]
 
-    # Known systems that usually have direct forms
-    form_domains = [
-        "jobylon", "recman", "cvpartner", "talenttech"
-    ]
+def build_extraction_result(task_id: str, job_url: str, final_url: str, email_link: str,
+                            button_text: str = "", is_finn_internal: bool = False) -> dict:
+    """
+    Decide form type and apply URL from the fields picked out of a Skyvern task.
+    Precedence: email > FINN Enkel søknad > validated external URL.
+    """
+    form_type = "unknown"
+    apply_url = final_url
+
+    if email_link:
+        # Application is via email
+        form_type = "email"
+        apply_url = email_link if email_link.startswith("mailto:") else f"mailto:{email_link}"
+        log(f"📧 Email application: {email_link}")
+    elif is_finn_internal or (button_text and "enkel søknad" in button_text.lower()):
+        # FINN Enkel Søknad - NO external URL needed
+        form_type = "finn_easy"
+        apply_url = None  # Clear any extracted URL
+        log(f"✅ FINN Enkel Søknad detected - no external URL needed")
+    elif final_url:
+        # Validate the URL before accepting it
+        if is_valid_apply_url(final_url, job_url):
+            form_type = detect_form_type_from_url(final_url)
+            log(f"✅ Valid external URL: {final_url}")
+        else:
+            log(f"⚠️ Invalid URL rejected: {final_url}")
+            apply_url = None
+
+    log(f"📝 Button text: {button_text}")
+    log(f"🏷️ Form type: {form_type}")
+    log(f"🔗 Final apply URL: {apply_url}")
+
+    return {
+        "success": bool(apply_url or form_type == "finn_easy"),
+        "external_url": apply_url,
+        "email": email_link if email_link else None,
+        "button_text": button_text,
+        "form_type": form_type,
+        "task_id": task_id
+    }
 
-    for domain in registration_domains:
-        if domain in url_lower:
-            return "external_registration"
 
-    for domain in form_domains:
-        if domain in url_lower:
-            return "external_form"
+# Apply buttons in the static listing HTML; same precedence as extract_job_text
+# ("Søk her" = external, checked before FINN's own "Enkel søknad")
+_FINN_ENKEL_RE = re.compile(r">\s*enkel\s+søknad\s*<", re.IGNORECASE)
+_SOK_HER_RE = re.compile(r">\s*søk\s+(?:her|på\s+stillingen)\s*<", re.IGNORECASE)
+_SOK_HER_LINK_RE = re.compile(
+    r'<a\b[^>]*?href="(https?://[^"]+)"[^>]*>(?:\s*<[^>]+>)*\s*søk\s+(?:her|på\s+stillingen)\s*<',
+    re.IGNORECASE,
+)
+_LISTING_HOSTS = ("finn.no", "nav.no")
+
+
+async def peek_apply_page(job_url: str) -> dict | None:
+    """
+    Fetch the listing page once and look for the apply button in its static HTML.
+    Returns the jobs columns for an external "Søk her" link or FINN's "Enkel
+    søknad" button, or None when the page is inconclusive (Skyvern decides then).
+    """
+    try:
+        response = await get_client().get(job_url, headers={"User-Agent": "Mozilla/5.0"})
+    except httpx.HTTPError as e:
+        log(f"   ⚠️ Listing page fetch failed: {e}")
+        return None
+    if response.status_code != 200:
+        return None
+    html = response.text
+
+    link = _SOK_HER_LINK_RE.search(html)
+    if link:
+        href = unescape(link.group(1))
+        host = (urlsplit(href).hostname or "").lower()
+        if not host.endswith(_LISTING_HOSTS) and is_valid_apply_url(href, job_url):
+            return {
+                "application_form_type": detect_form_type_from_url(href),
+                "has_enkel_soknad": False,
+                "external_apply_url": href,
+            }
+    if "finn.no" in job_url.lower() and _FINN_ENKEL_RE.search(html) and not _SOK_HER_RE.search(html):
+        return {"application_form_type": "finn_easy", "has_enkel_soknad": True, "external_apply_url": None}
+    return None
+
+
+# Form types a Skyvern run can settle on (copied as-is between copies of a listing)
+_SKYVERN_RESULT_TYPES = ["external_form", "external_registration", "email", "finn_easy"]
 
-    return "external_form"  # Default to form if we got a URL
+
+async def find_known_detection(supabase, job_url: str, job_id: str) -> dict | None:
+    """
+    Look up a Skyvern result for the same job_url on another user's copy of the job.
+    job_url is only unique per user, so popular listings are scanned once per user;
+    uses the (job_url, user_id) index.
+    """
+    try:
+        response = await asyncio.to_thread(
+            supabase.table("jobs").select(
+                "application_form_type, external_apply_url, has_enkel_soknad"
+            ).eq("job_url", job_url).neq("id", job_id).in_(
+                "application_form_type", _SKYVERN_RESULT_TYPES
+            ).limit(1).execute
+        )
+    except Exception as e:
+        log(f"   ⚠️ Known-detection lookup failed: {e}")
+        return None
+    if not response.data:
+        return None
+    row = response.data[0]
+    if row["application_form_type"] != "finn_easy" and not row.get("external_apply_url"):
+        return None
+    return {
+        "application_form_type": row["application_form_type"],
+        "has_enkel_soknad": row["application_form_type"] == "finn_easy",
+        "external_apply_url": row.get("external_apply_url") if row["application_form_type"] != "finn_easy" else None,
+    }
+
+
+async def process_daemon_job(supabase, job: dict, skyvern_slots: asyncio.Semaphore) -> dict | None:
+    """
+    Detect the apply URL / form type for one job (daemon mode).
+    Returns the jobs row update ({"id": ..., <columns>}) or None if nothing to write;
+    the daemon flushes all updates of one poll with a single bulk_update_jobs call.
+    """
+    job_id = job["id"]
+    job_url = job.get("job_url")
+    source = job.get("source", "FINN")
+    title = job.get("title", "Unknown")[:50]
+    has_enkel = job.get("has_enkel_soknad", False)
+    form_type = job.get("application_form_type", "")
+    is_finn = "finn.no" in str(job_url).lower()
+
+    # Skip FINN Easy Apply jobs that are already correctly detected
+    if has_enkel or form_type == "finn_easy":
+        log(f"⏭️ Skipping {title[:30]}... (FINN Easy Apply)")
+        return None
+
+    if not job_url:
+        log(f"⚠️ Job {job_id} has no URL, skipping")
+        return None
+
+    log(f"🔍 Processing: {title}")
+    log(f"   URL: {job_url}")
+    log(f"   Source: {source}, Is FINN: {is_finn}")
+
+    # For FINN jobs that might be Enkel søknad, use extract_job_text instead of Skyvern
+    # This is faster and doesn't require browser automation
+    if is_finn and (not has_enkel or form_type in ["unknown", None, ""]):
+        log(f"   🔄 Re-checking FINN job via extract_job_text (might be Enkel søknad)")
+        try:
+            supabase_url = os.getenv("SUPABASE_URL")
+            supabase_key = os.getenv("SUPABASE_SERVICE_KEY")
+
+            # Call extract_job_text edge function
+            response = await get_client().post(
+                f"{supabase_url}/functions/v1/extract_job_text",
+                content=orjson.dumps({"job_id": job_id, "url": job_url}),
+                headers={
+                    "Authorization": f"Bearer {supabase_key}",
+                    "Content-Type": "application/json"
+                },
+                timeout=30.0
+            )
+
+            if response.status_code == 200:
+                result_data = orjson.loads(response.content)
+                if result_data.get("success"):
+                    has_enkel_detected = result_data.get("has_enkel_soknad", False)
+                    form_type_detected = result_data.get("application_form_type", "unknown")
+                    external_url = result_data.get("external_apply_url")
+
+                    log(f"   ✅ Re-check result: has_enkel={has_enkel_detected}, type={form_type_detected}")
+
+                    # Update job with new detection
+                    update_data = {
+                        "has_enkel_soknad": has_enkel_detected,
+                        "application_form_type": form_type_detected
+                    }
+                    if external_url:
+                        update_data["external_apply_url"] = external_url
+
+                    # Done — no Skyvern needed
+                    return {"id": job_id, **update_data}
+                else:
+                    log(f"   ⚠️ extract_job_text failed: {result_data.get('error', 'Unknown')}")
+                    use_skyvern = True
+            else:
+                log(f"   ⚠️ HTTP error: {response.status_code}")
+                use_skyvern = True
+        except Exception as e:
+            log(f"   ⚠️ Error calling extract_job_text: {e}")
+            use_skyvern = True
+    else:
+        # For non-FINN jobs, always use Skyvern
+        use_skyvern = True
+
+    # Use Skyvern if needed
+    if use_skyvern:
+        # Same listing already detected for another user? Reuse it, no browser run
+        known = await find_known_detection(supabase, job_url, job_id)
+        if known:
+            log(f"♻️ Reusing detection from another copy of this job: {known['application_form_type']}")
+            return {"id": job_id, **known}
+
+        # Apply button in the static HTML (non-FINN jobs, or extract_job_text unavailable)
+        peeked = await peek_apply_page(job_url)
+        if peeked:
+            log(f"✅ Found on page, Skyvern skipped: {peeked['application_form_type']} → {peeked['external_apply_url']}")
+            return {"id": job_id, **peeked}
+
+        # Mark as processing
+        await asyncio.to_thread(supabase.table("jobs").update({
+            "application_form_type": "processing"
+        }).eq("id", job_id).execute)
+
+        async with skyvern_slots:
+            result = await extract_apply_url_skyvern(job_url, source)
+
+        if result.get("retryable"):
+            # Don't mark skyvern_failed: the claim expires and the job is retried
+            raise RuntimeError(result["error"])
+
+        if result.get("success"):
+            form_type = result["form_type"]
+            external_url = result.get("external_url")
+
+            # Update the job based on form type
+            update_data = {
+                "application_form_type": form_type,
+                "has_enkel_soknad": form_type == "finn_easy"
+            }
+
+            # Only set external_apply_url if we have a valid one
+            # For finn_easy, we DON'T set external_apply_url
+            if external_url and form_type != "finn_easy":
+                update_data["external_apply_url"] = external_url
+                log(f"✅ Updated: {form_type} → {external_url[:60]}...")
+            elif form_type == "finn_easy":
+                # Clear any wrong external_apply_url for finn_easy
+                update_data["external_apply_url"] = None
+                log(f"✅ Updated: FINN Easy Apply (no external URL needed)")
+            else:
+                log(f"⚠️ No valid URL extracted, marking as {form_type}")
+
+            return {"id": job_id, **update_data}
+        else:
+            log(f"❌ Failed: {result.get('error', 'Unknown error')}")
+            # Mark as failed
+            return {"id": job_id, "application_form_type": "skyvern_failed"}
+
+    return None
+
+
+_realtime_client = None  # keep a reference so the Realtime socket stays open
+
+
+async def start_jobs_listener(wake: asyncio.Event) -> bool:
+    """
+    Subscribe to Supabase Realtime inserts on `jobs` and set `wake` for each one.
+    Returns False if Realtime is unavailable (daemon falls back to polling).
+    """
+    global _realtime_client
+    try:
+        from supabase import acreate_client
+        _realtime_client = await acreate_client(SUPABASE_URL, SUPABASE_KEY)
+
+        def _on_insert(payload):
+            wake.set()
+
+        channel = _realtime_client.channel("extractor-jobs")
+        channel.on_postgres_changes("INSERT", schema="public", table="jobs", callback=_on_insert)
+        await channel.subscribe()
+        return True
+    except Exception as e:
+        log(f"⚠️ Realtime subscription failed, using polling only: {e}")
+        return False
 
 
 async def daemon_mode():
@@ -517,51 +1037,53 @@ async def daemon_mode():
     log(f"📡 Skyvern API: {SKYVERN_URL}")
     log("👀 Watching for jobs without external_apply_url...")
 
-    processed_ids = set()  # Track processed jobs to avoid re-processing
+    # Track processed jobs to avoid re-processing; insertion-ordered so the
+    # oldest ids can be evicted once PROCESSED_IDS_MAX is reached
+    processed_ids: OrderedDict[str, None] = OrderedDict()
+    skyvern_slots = asyncio.Semaphore(SKYVERN_CONCURRENCY)  # bound parallel Skyvern tasks
+
+    # New jobs wake the loop immediately; the poll interval is only a safety net
+    wake = asyncio.Event()
+    poll_interval = DAEMON_POLL_INTERVAL
+    if await start_jobs_listener(wake):
+        log("⚡ Realtime: listening for new jobs")
+        poll_interval = DAEMON_BACKUP_POLL_INTERVAL
 
     while True:
+        # Circuit breaker: Skyvern unreachable -> stop claiming jobs for a while
+        failures = _skyvern_breaker["connect_failures"]
+        if failures >= SKYVERN_BREAKER_THRESHOLD:
+            pause = min(SKYVERN_BREAKER_MAX_PAUSE, 2 ** failures)
+            log(f"🔌 Skyvern unreachable ({failures} connect errors), pausing {pause}s")
+            await asyncio.sleep(pause)
+            if await check_skyvern_health():
+                log("✅ Skyvern is reachable again")
+                _skyvern_breaker["connect_failures"] = 0
+            else:
+                _skyvern_breaker["connect_failures"] += 1
+            continue
+
+        wake.clear()
         try:
             # Look for jobs that need URL extraction:
             # - external_apply_url is NULL OR (FINN job without finn.no/job/apply URL)
             # - has a job_url
             # - NOT already detected as finn_easy (those don't need external URL!)
             # - NOT has_enkel_soknad = true
-            # - created in last 30 days (increased from 7 to catch more old jobs)
-            from datetime import timedelta
-            thirty_days_ago = (datetime.now() - timedelta(days=30)).isoformat()
+            # - created in last 30 days (increased from 7 to catch more old jobs;
+            #   the RPC's p_since default computes the cutoff server-side)
 
             # Look for FINN jobs that might need re-checking (old jobs with wrong detection):
             # - FINN jobs with has_enkel_soknad=false/null AND application_form_type != 'finn_easy'
             # - AND (external_apply_url is NULL OR doesn't contain 'finn.no/job/apply')
-            # This catches old jobs that were scanned before our improved detection
-            try:
-                # Query 1: FINN jobs with has_enkel_soknad = false
-                finn_false = supabase.table("jobs").select(
-                    "id, title, job_url, source, has_enkel_soknad, application_form_type, external_apply_url"
-                ).ilike("job_url", "%finn.no%").eq("has_enkel_soknad", False).neq("application_form_type", "finn_easy").gte("created_at", thirty_days_ago).order("created_at", desc=True).limit(3).execute()
-                
-                # Query 2: FINN jobs with has_enkel_soknad = null
-                finn_null = supabase.table("jobs").select(
-                    "id, title, job_url, source, has_enkel_soknad, application_form_type, external_apply_url"
-                ).ilike("job_url", "%finn.no%").is_("has_enkel_soknad", "null").neq("application_form_type", "finn_easy").gte("created_at", thirty_days_ago).order("created_at", desc=True).limit(3).execute()
-                
-                finn_jobs = (finn_false.data or []) + (finn_null.data or [])
-                
-                # Filter: only jobs without correct external_apply_url
-                finn_jobs = [j for j in finn_jobs if not j.get("external_apply_url") or "finn.no/job/apply" not in str(j.get("external_apply_url", ""))]
-            except Exception as e:
-                log(f"⚠️ Error querying FINN jobs: {e}")
-                finn_jobs = []
-
-            # Also get non-FINN jobs that need URL extraction (original logic)
-            other_jobs_response = supabase.table("jobs").select(
-                "id, title, job_url, source, has_enkel_soknad, application_form_type, external_apply_url"
-            ).is_("external_apply_url", "null").neq("application_form_type", "finn_easy").neq("has_enkel_soknad", True).not_.ilike("job_url", "%finn.no%").gte("created_at", thirty_days_ago).order("created_at", desc=True).limit(5).execute()
-
-            other_jobs = other_jobs_response.data or []
-            
-            # Combine both queries
-            jobs = finn_jobs + other_jobs
+            # plus non-FINN jobs without external_apply_url.
+            # Fetched and claimed atomically (FOR UPDATE SKIP LOCKED) so parallel daemons
+            # never process the same job — see database/jobs_extract_claim.sql
+            claim_response = await asyncio.to_thread(supabase.rpc("claim_jobs_for_extraction", {
+                "p_finn_limit": 6,
+                "p_other_limit": 5,
+            }).execute)
+            jobs = claim_response.data or []
 
             # Filter out already processed jobs
             new_jobs = [j for j in jobs if j["id"] not in processed_ids]
@@ -569,156 +1091,55 @@ async def daemon_mode():
             if new_jobs:
                 log(f"📬 Found {len(new_jobs)} jobs needing URL extraction")
 
-                for job in new_jobs:
-                    job_id = job["id"]
-                    job_url = job.get("job_url")
-                    source = job.get("source", "FINN")
-                    title = job.get("title", "Unknown")[:50]
-                    has_enkel = job.get("has_enkel_soknad", False)
-                    form_type = job.get("application_form_type", "")
-                    is_finn = "finn.no" in str(job_url).lower()
-
-                    # Skip FINN Easy Apply jobs that are already correctly detected
-                    if has_enkel or form_type == "finn_easy":
-                        log(f"⏭️ Skipping {title[:30]}... (FINN Easy Apply)")
-                        processed_ids.add(job_id)
-                        continue
-
-                    if not job_url:
-                        log(f"⚠️ Job {job_id} has no URL, skipping")
-                        processed_ids.add(job_id)
+                # Only Skyvern runs take a slot: quick FINN re-checks never queue behind them
+                results = await asyncio.gather(
+                    *[process_daemon_job(supabase, j, skyvern_slots) for j in new_jobs],
+                    return_exceptions=True,
+                )
+                updates = []
+                done_ids = []
+                for job, result in zip(new_jobs, results):
+                    if isinstance(result, Exception):
+                        # Not marked as processed — retried on the next poll
+                        log(f"⚠️ Job {job['id']} failed: {result}")
                         continue
+                    if result:
+                        updates.append(result)
+                    done_ids.append(job["id"])
 
-                    log(f"🔍 Processing: {title}")
-                    log(f"   URL: {job_url}")
-                    log(f"   Source: {source}, Is FINN: {is_finn}")
-
-                    # For FINN jobs that might be Enkel søknad, use extract_job_text instead of Skyvern
-                    # This is faster and doesn't require browser automation
-                    if is_finn and (not has_enkel or form_type in ["unknown", None, ""]):
-                        log(f"   🔄 Re-checking FINN job via extract_job_text (might be Enkel søknad)")
-                        try:
-                            import httpx
-                            supabase_url = os.getenv("SUPABASE_URL")
-                            supabase_key = os.getenv("SUPABASE_SERVICE_KEY")
-                            
-                            # Call extract_job_text edge function
-                            async with httpx.AsyncClient() as client:
-                                response = await client.post(
-                                    f"{supabase_url}/functions/v1/extract_job_text",
-                                    json={"job_id": job_id, "url": job_url},
-                                    headers={
-                                        "Authorization": f"Bearer {supabase_key}",
-                                        "Content-Type": "application/json"
-                                    },
-                                    timeout=30.0
-                                )
-                                
-                                if response.status_code == 200:
-                                    result_data = response.json()
-                                    if result_data.get("success"):
-                                        has_enkel_detected = result_data.get("has_enkel_soknad", False)
-                                        form_type_detected = result_data.get("application_form_type", "unknown")
-                                        external_url = result_data.get("external_apply_url")
-                                        
-                                        log(f"   ✅ Re-check result: has_enkel={has_enkel_detected}, type={form_type_detected}")
-                                        
-                                        # Update job with new detection
-                                        update_data = {
-                                            "has_enkel_soknad": has_enkel_detected,
-                                            "application_form_type": form_type_detected
-                                        }
-                                        if external_url:
-                                            update_data["external_apply_url"] = external_url
-                                        
-                                        supabase.table("jobs").update(update_data).eq("id", job_id).execute()
-                                        log(f"   ✅ Updated job with new detection")
-                                        # Mark as processed and continue to next job
-                                        processed_ids.add(job_id)
-                                        continue
-                                    else:
-                                        log(f"   ⚠️ extract_job_text failed: {result_data.get('error', 'Unknown')}")
-                                        use_skyvern = True
-                                else:
-                                    log(f"   ⚠️ HTTP error: {response.status_code}")
-                                    use_skyvern = True
-                        except Exception as e:
-                            log(f"   ⚠️ Error calling extract_job_text: {e}")
-                            use_skyvern = True
-                    else:
-                        # For non-FINN jobs, always use Skyvern
-                        use_skyvern = True
-
-                    # Use Skyvern if needed
-                    if use_skyvern:
-                        # Mark as processing
-                        supabase.table("jobs").update({
-                            "application_form_type": "processing"
-                        }).eq("id", job_id).execute()
-
-                        result = await extract_apply_url_skyvern(job_url, source)
-
-                        if result.get("success"):
-                            form_type = result["form_type"]
-                            external_url = result.get("external_url")
-
-                            # Update the job based on form type
-                            update_data = {
-                                "application_form_type": form_type,
-                                "has_enkel_soknad": form_type == "finn_easy"
-                            }
-
-                            # Only set external_apply_url if we have a valid one
-                            # For finn_easy, we DON'T set external_apply_url
-                            if external_url and form_type != "finn_easy":
-                                update_data["external_apply_url"] = external_url
-                                log(f"✅ Updated: {form_type} → {external_url[:60]}...")
-                            elif form_type == "finn_easy":
-                                # Clear any wrong external_apply_url for finn_easy
-                                update_data["external_apply_url"] = None
-                                log(f"✅ Updated: FINN Easy Apply (no external URL needed)")
-                            else:
-                                log(f"⚠️ No valid URL extracted, marking as {form_type}")
-
-                            supabase.table("jobs").update(update_data).eq("id", job_id).execute()
-                        else:
-                            # Mark as failed
-                            supabase.table("jobs").update({
-                                "application_form_type": "skyvern_failed"
-                            }).eq("id", job_id).execute()
-                            log(f"❌ Failed: {result.get('error', 'Unknown error')}")
-
-                    # Mark as processed
-                    processed_ids.add(job_id)
-
-                    # Small delay between jobs to not overload Skyvern
-                    await asyncio.sleep(2)
+                # One round-trip for all detections of this poll
+                if updates:
+                    try:
+                        await asyncio.to_thread(supabase.rpc("bulk_update_jobs", {"p_rows": updates}).execute)
+                        log(f"✅ Updated {len(updates)} jobs")
+                    except Exception as e:
+                        # Keep them unprocessed so the next poll retries the write
+                        log(f"⚠️ Bulk job update failed: {e}")
+                        failed = {u["id"] for u in updates}
+                        done_ids = [i for i in done_ids if i not in failed]
+                processed_ids.update(dict.fromkeys(done_ids))
+                while len(processed_ids) > PROCESSED_IDS_MAX:
+                    processed_ids.popitem(last=False)
 
             else:
                 # No new jobs, wait longer
-                log("💤 No new jobs, waiting...")
+                log("💤 No new jobs, waiting...", logging.DEBUG)
 
         except Exception as e:
             log(f"⚠️ Daemon error: {e}")
             import traceback
             traceback.print_exc()
 
-        # Poll every 30 seconds
-        await asyncio.sleep(30)
+        # Wait for a new job (Realtime) or the next poll
+        try:
+            await asyncio.wait_for(wake.wait(), timeout=poll_interval)
+        except asyncio.TimeoutError:
+            pass
 
 
 async def main():
     """Main entry point."""
 
-    # Check Skyvern health first
-    if not await check_skyvern_health():
-        log("❌ Skyvern is not running!")
-        log("   Start it with: docker compose up -d")
-        log("   Or: skyvern quickstart")
-        return
-
-    log("✅ Skyvern is running")
-
     if len(sys.argv) < 2:
         print("Usage:")
         print("  python extract_apply_url.py <job_url>")
@@ -727,18 +1148,39 @@ async def main():
 
     arg = sys.argv[1]
 
-    if arg == "--daemon":
-        await daemon_mode()
-    else:
-        # Single URL extraction
-        job_url = arg
-        source = "NAV" if "nav.no" in job_url.lower() else "FINN"
-
-        log(f"🔍 Extracting apply URL from: {job_url}")
-        result = await extract_apply_url_skyvern(job_url, source)
-
-        print(json.dumps(result, indent=2, ensure_ascii=False))
+    try:
+        if arg == "--daemon":
+            # Check Skyvern once at startup; afterwards connect errors trip the breaker.
+            # (Single-URL mode reports a connect error from the task POST itself.)
+            if not await check_skyvern_health():
+                log("❌ Skyvern is not running!")
+                log("   Start it with: docker compose up -d")
+                log("   Or: skyvern quickstart")
+                return
+
+            log("✅ Skyvern is running")
+            # Only the daemon owns the callback port; one-off URL runs just poll
+            if await start_webhook_server():
+                log(f"📨 Skyvern webhooks: listening on {SKYVERN_WEBHOOK_HOST}:{SKYVERN_WEBHOOK_PORT}")
+            await daemon_mode()
+        else:
+            # Single URL extraction
+            job_url = arg
+            source = "NAV" if "nav.no" in job_url.lower() else "FINN"
+
+            log(f"🔍 Extracting apply URL from: {job_url}")
+            result = await extract_apply_url_skyvern(job_url, source)
+
+            print(orjson.dumps(result, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode())
+    finally:
+        await stop_webhook_server()
+        await close_client()
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    try:
+        import uvloop  # faster event loop for the daemon's many concurrent polls
+    except ImportError:  # optional (no Windows build)
+        asyncio.run(main())
+    else:
+        uvloop.run(main())
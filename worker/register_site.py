@@ -21,14 +21,18 @@ Usage:
 """
 
 import asyncio
+import contextlib
 import os
 import json
+import random
 import re
 import secrets
 import string
+import time
 import logging
 from logging.handlers import RotatingFileHandler
 import httpx
+import orjson
 from datetime import datetime, timedelta
 from urllib.parse import urlparse
 from dotenv import load_dotenv
@@ -47,6 +51,37 @@ HF_TOKEN = os.getenv("HF_TOKEN", "")
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN", "")
 
 
+# Shared keep-alive HTTP clients (one connection pool per host for the process lifetime)
+HTTP_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=30.0)
+_skyvern_http: httpx.AsyncClient | None = None
+_telegram_http: httpx.AsyncClient | None = None
+
+
+@contextlib.asynccontextmanager
+async def skyvern_client():
+    """Yield the shared Skyvern HTTP client (not closed on exit, unlike `async with httpx.AsyncClient()`)."""
+    global _skyvern_http
+    if _skyvern_http is None or _skyvern_http.is_closed:
+        _skyvern_http = httpx.AsyncClient(http2=True, limits=HTTP_LIMITS)  # task polls share one connection
+    yield _skyvern_http
+
+
+@contextlib.asynccontextmanager
+async def telegram_client():
+    """Yield the shared Telegram Bot API HTTP client."""
+    global _telegram_http
+    if _telegram_http is None or _telegram_http.is_closed:
+        _telegram_http = httpx.AsyncClient(limits=HTTP_LIMITS)
+    yield _telegram_http
+
+
+async def close_http_clients():
+    """Close shared HTTP clients on shutdown."""
+    for client in (_skyvern_http, _telegram_http):
+        if client is not None and not client.is_closed:
+            await client.aclose()
+
+
 def skyvern_headers() -> dict:
     """Build headers for Skyvern API (includes HF auth for private spaces)."""
     headers = skyvern_headers()
@@ -58,6 +93,8 @@ DEFAULT_EMAIL = os.getenv("DEFAULT_REGISTRATION_EMAIL", "")  # Email for registr
 # Timeouts
 QUESTION_TIMEOUT_SECONDS = 300  # 5 minutes
 VERIFICATION_TIMEOUT_SECONDS = 300  # 5 minutes
+MONITOR_POLL_MIN = 2.0  # registration task poll delay (s) after a status change / new steps
+MONITOR_POLL_MAX = 10.0  # cap for the registration task poll delay (s)
 
 if not SUPABASE_URL or not SUPABASE_KEY:
     print("❌ Missing SUPABASE_URL or SUPABASE_SERVICE_KEY in .env file")
@@ -81,7 +118,7 @@ _file_logger.addHandler(_file_handler)
 
 async def log(msg: str, flow_id: str = None):
     """Log message with timestamp and optional flow ID."""
-    timestamp = datetime.now().strftime("%H:%M:%S")
+    timestamp = time.strftime("%H:%M:%S")
     prefix = f"[{timestamp}]"
     if flow_id:
         prefix += f" [{flow_id[:8]}]"
@@ -177,7 +214,7 @@ async def send_telegram(chat_id: str, text: str, reply_markup: dict = None) -> i
         return None
 
     try:
-        async with httpx.AsyncClient() as client:
+        async with telegram_client() as client:
             payload = {
                 "chat_id": chat_id,
                 "text": text,
@@ -209,7 +246,7 @@ async def edit_telegram_message(chat_id: str, message_id: int, text: str, reply_
         return
 
     try:
-        async with httpx.AsyncClient() as client:
+        async with telegram_client() as client:
             payload = {
                 "chat_id": chat_id,
                 "message_id": message_id,
@@ -452,7 +489,7 @@ def get_field_question(field_name: str) -> str:
 async def get_knowledge_base() -> dict:
     """Get all user knowledge base entries as dict."""
     try:
-        response = supabase.table("user_knowledge_base").select("*").execute()
+        response = await asyncio.to_thread(supabase.table("user_knowledge_base").select("*").execute)
         kb_data = {}
         for item in response.data:
             # Store with normalized key
@@ -470,7 +507,7 @@ async def save_to_knowledge_base(field_name: str, answer: str, category: str = "
     """Save a new answer to the knowledge base."""
     try:
         # Get user_id from first user_settings
-        user_response = supabase.table("user_settings").select("user_id").limit(1).execute()
+        user_response = await asyncio.to_thread(supabase.table("user_settings").select("user_id").limit(1).execute)
         user_id = user_response.data[0]['user_id'] if user_response.data else None
 
         if not user_id:
@@ -478,25 +515,25 @@ async def save_to_knowledge_base(field_name: str, answer: str, category: str = "
             return False
 
         # Check if already exists
-        existing = supabase.table("user_knowledge_base") \
+        existing = await asyncio.to_thread(supabase.table("user_knowledge_base") \
             .select("id") \
             .eq("question", field_name) \
-            .execute()
+            .execute)
 
         if existing.data:
             # Update existing
-            supabase.table("user_knowledge_base") \
+            await asyncio.to_thread(supabase.table("user_knowledge_base") \
                 .update({"answer": answer}) \
                 .eq("id", existing.data[0]['id']) \
-                .execute()
+                .execute)
         else:
             # Insert new
-            supabase.table("user_knowledge_base").insert({
+            await asyncio.to_thread(supabase.table("user_knowledge_base").insert({
                 "user_id": user_id,
                 "question": field_name,
                 "answer": answer,
                 "category": category
-            }).execute()
+            }).execute)
 
         await log(f"💾 Saved to knowledge base: {field_name} = {answer}")
         return True
@@ -522,10 +559,10 @@ async def ask_user_for_field(chat_id: str, flow_id: str, field_name: str, contex
 
     # Store pending question in database
     try:
-        supabase.table("registration_flows").update({
+        await asyncio.to_thread(supabase.table("registration_flows").update({
             "pending_question": field_name,
             "status": "waiting_answer"
-        }).eq("id", flow_id).execute()
+        }).eq("id", flow_id).execute)
     except Exception as e:
         await log(f"⚠️ Failed to update flow status: {e}")
 
@@ -534,16 +571,16 @@ async def ask_user_for_field(chat_id: str, flow_id: str, field_name: str, contex
     await log(f"❓ Asked user for: {field_name}", flow_id)
 
     # Wait for answer (poll database)
-    start_time = datetime.now()
-    while (datetime.now() - start_time).total_seconds() < QUESTION_TIMEOUT_SECONDS:
+    start_time = time.monotonic()
+    while time.monotonic() - start_time < QUESTION_TIMEOUT_SECONDS:
         await asyncio.sleep(3)
 
         try:
-            flow = supabase.table("registration_flows") \
+            flow = await asyncio.to_thread(supabase.table("registration_flows") \
                 .select("pending_question, qa_history, status") \
                 .eq("id", flow_id) \
                 .single() \
-                .execute()
+                .execute)
 
             if flow.data:
                 # Check if answer was provided (bot updates qa_history)
@@ -585,7 +622,7 @@ async def get_site_credentials(domain: str, user_id: str = None) -> dict | None:
             .eq("status", "active")
         if user_id:
             query = query.eq("user_id", user_id)
-        response = query.limit(1).execute()
+        response = await asyncio.to_thread(query.limit(1).execute)
 
         if response.data and len(response.data) > 0:
             return response.data[0]
@@ -622,9 +659,9 @@ async def save_site_credentials(
         if skyvern_credential_id:
             data["skyvern_credential_id"] = skyvern_credential_id
 
-        response = supabase.table("site_credentials").upsert(
+        response = await asyncio.to_thread(supabase.table("site_credentials").upsert(
             data, on_conflict="site_domain,email"
-        ).execute()
+        ).execute)
 
         if response.data and len(response.data) > 0:
             await log(f"✅ Credentials saved for {domain} ({email})")
@@ -643,7 +680,7 @@ async def get_active_profile(user_id: str = None) -> dict:
             .eq("is_active", True)
         if user_id:
             query = query.eq("user_id", user_id)
-        response = query.limit(1).execute()
+        response = await asyncio.to_thread(query.limit(1).execute)
 
         if response.data and len(response.data) > 0:
             return response.data[0]
@@ -660,7 +697,7 @@ async def get_telegram_chat_id(user_id: str = None) -> str | None:
             .select("telegram_chat_id")
         if user_id:
             query = query.eq("user_id", user_id)
-        response = query.limit(1).execute()
+        response = await asyncio.to_thread(query.limit(1).execute)
 
         if response.data and len(response.data) > 0:
             return response.data[0].get('telegram_chat_id')
@@ -713,7 +750,7 @@ async def create_registration_flow(
             "expires_at": (datetime.now() + timedelta(minutes=30)).isoformat()
         }
 
-        response = supabase.table("registration_flows").insert(data).execute()
+        response = await asyncio.to_thread(supabase.table("registration_flows").insert(data).execute)
 
         if response.data and len(response.data) > 0:
             return response.data[0]['id']
@@ -729,10 +766,10 @@ async def update_flow_status(flow_id: str, status: str, **kwargs):
         data = {"status": status}
         data.update(kwargs)
 
-        supabase.table("registration_flows") \
+        await asyncio.to_thread(supabase.table("registration_flows") \
             .update(data) \
             .eq("id", flow_id) \
-            .execute()
+            .execute)
     except Exception as e:
         await log(f"⚠️ Failed to update flow: {e}", flow_id)
 
@@ -740,11 +777,11 @@ async def update_flow_status(flow_id: str, status: str, **kwargs):
 async def get_flow(flow_id: str) -> dict | None:
     """Get registration flow by ID."""
     try:
-        response = supabase.table("registration_flows") \
+        response = await asyncio.to_thread(supabase.table("registration_flows") \
             .select("*") \
             .eq("id", flow_id) \
             .single() \
-            .execute()
+            .execute)
         return response.data
     except:
         return None
@@ -784,7 +821,7 @@ async def ask_user_question(
     }
 
     try:
-        q_response = supabase.table("registration_questions").insert(question_data).execute()
+        q_response = await asyncio.to_thread(supabase.table("registration_questions").insert(question_data).execute)
         question_id = q_response.data[0]['id'] if q_response.data else None
     except Exception as e:
         await log(f"⚠️ Failed to create question: {e}", flow_id)
@@ -822,22 +859,22 @@ async def ask_user_question(
     # Send Telegram message
     msg_id = await send_telegram(chat_id, message, reply_markup)
     if msg_id:
-        supabase.table("registration_questions") \
+        await asyncio.to_thread(supabase.table("registration_questions") \
             .update({"telegram_message_id": msg_id}) \
             .eq("id", question_id) \
-            .execute()
+            .execute)
 
     # Wait for answer (poll database)
-    start_time = datetime.now()
-    while (datetime.now() - start_time).seconds < QUESTION_TIMEOUT_SECONDS:
+    start_time = time.monotonic()
+    while time.monotonic() - start_time < QUESTION_TIMEOUT_SECONDS:
         await asyncio.sleep(3)  # Poll every 3 seconds
 
         try:
-            q_res = supabase.table("registration_questions") \
+            q_res = await asyncio.to_thread(supabase.table("registration_questions") \
                 .select("status, answer") \
                 .eq("id", question_id) \
                 .single() \
-                .execute()
+                .execute)
 
             if q_res.data:
                 status = q_res.data.get('status')
@@ -868,10 +905,10 @@ async def ask_user_question(
 
     # Timeout
     await log(f"⏱️ Question timeout for {field_name}", flow_id)
-    supabase.table("registration_questions") \
+    await asyncio.to_thread(supabase.table("registration_questions") \
         .update({"status": "timeout"}) \
         .eq("id", question_id) \
-        .execute()
+        .execute)
 
     if chat_id:
         await send_telegram(chat_id, f"⏱️ Час вийшов для питання про {field_name}")
@@ -932,8 +969,8 @@ async def ask_verification_code(
     await send_telegram(chat_id, message)
 
     # Wait for code (poll database or Telegram)
-    start_time = datetime.now()
-    while (datetime.now() - start_time).seconds < VERIFICATION_TIMEOUT_SECONDS:
+    start_time = time.monotonic()
+    while time.monotonic() - start_time < VERIFICATION_TIMEOUT_SECONDS:
         await asyncio.sleep(3)
 
         # Check if code was submitted
@@ -1049,17 +1086,17 @@ async def add_credential_to_skyvern(domain: str, email: str, password: str) -> s
         "description": f"Auto-registered on {datetime.now().strftime('%Y-%m-%d')}"
     }
 
-    async with httpx.AsyncClient() as client:
+    async with skyvern_client() as client:
         try:
             response = await client.post(
                 f"{SKYVERN_URL}/api/v1/credentials/passwords",
-                json=payload,
-                headers=headers,
+                content=orjson.dumps(payload),
+                headers={**headers, "Content-Type": "application/json"},
                 timeout=30.0
             )
 
             if response.status_code in [200, 201]:
-                data = response.json()
+                data = orjson.loads(response.content)
                 return data.get('credential_id') or data.get('id')
             else:
                 await log(f"⚠️ Failed to add Skyvern credential: {response.text}")
@@ -1141,18 +1178,18 @@ async def trigger_registration_task(
 
     headers = skyvern_headers()
 
-    async with httpx.AsyncClient() as client:
+    async with skyvern_client() as client:
         try:
             await log(f"🚀 Starting registration task on {site_name}...", flow_id)
             response = await client.post(
                 f"{SKYVERN_URL}/api/v1/tasks",
-                json=payload,
-                headers=headers,
+                content=orjson.dumps(payload),
+                headers={**headers, "Content-Type": "application/json"},
                 timeout=30.0
             )
 
             if response.status_code == 200:
-                task_data = response.json()
+                task_data = orjson.loads(response.content)
                 task_id = task_data.get('task_id')
                 await log(f"✅ Registration task started: {task_id}", flow_id)
                 return task_id
@@ -1281,13 +1318,17 @@ async def monitor_registration_task(flow_id: str, task_id: str,
     all_filled_fields = []
     dashboard_msg_id = None
 
+    # Poll backoff: quick while the task makes progress, slower while it is idle
+    poll_delay = MONITOR_POLL_MIN
+    last_status = None
+
     if chat_id:
         dashboard_text = format_registration_dashboard(
             site_name or "Site", task_id, 0, [], "running"
         )
         dashboard_msg_id = await send_telegram(chat_id, dashboard_text)
 
-    async with httpx.AsyncClient() as client:
+    async with skyvern_client() as client:
         while True:
             try:
                 response = await client.get(
@@ -1297,10 +1338,14 @@ async def monitor_registration_task(flow_id: str, task_id: str,
                 )
 
                 if response.status_code == 200:
-                    data = response.json()
+                    data = orjson.loads(response.content)
                     status = data.get('status')
                     extracted = data.get('extracted_information', {}) or {}
 
+                    if status != last_status:
+                        last_status = status
+                        poll_delay = MONITOR_POLL_MIN
+
                     if status == 'completed':
                         await log(f"✅ Registration task completed", flow_id)
                         # Final dashboard update
@@ -1390,6 +1435,7 @@ async def monitor_registration_task(flow_id: str, task_id: str,
                                 await send_telegram(chat_id, report)
 
                             seen_step_count = len(steps)
+                            poll_delay = MONITOR_POLL_MIN  # new steps: keep the dashboard live
 
                             # Update dashboard
                             if dashboard_msg_id:
@@ -1399,11 +1445,13 @@ async def monitor_registration_task(flow_id: str, task_id: str,
                                 )
                                 await edit_telegram_message(chat_id, dashboard_msg_id, dashboard_text)
 
-                await asyncio.sleep(5)
+                await asyncio.sleep(poll_delay + random.uniform(0, 0.25))
+                poll_delay = min(poll_delay * 1.5, MONITOR_POLL_MAX)
 
             except Exception as e:
                 await log(f"⚠️ Monitoring error: {e}", flow_id)
-                await asyncio.sleep(5)
+                await asyncio.sleep(poll_delay + random.uniform(0, 0.25))
+                poll_delay = min(poll_delay * 1.5, MONITOR_POLL_MAX)
 
 
 # ============================================
@@ -1519,10 +1567,10 @@ async def wait_for_registration_confirmation(flow_id: str) -> str:
     """
     await log(f"⏳ Waiting for registration confirmation", flow_id)
 
-    start_time = datetime.now()
+    start_time = time.monotonic()
     poll_interval = 3  # seconds
 
-    while (datetime.now() - start_time).total_seconds() < REGISTRATION_CONFIRMATION_TIMEOUT:
+    while time.monotonic() - start_time < REGISTRATION_CONFIRMATION_TIMEOUT:
         await asyncio.sleep(poll_interval)
 
         try:
@@ -1544,7 +1592,7 @@ async def wait_for_registration_confirmation(flow_id: str) -> str:
                 # Continue waiting if user is editing
                 if status in ['editing', 'editing_field']:
                     # Reset start time while user is actively editing
-                    start_time = datetime.now()
+                    start_time = time.monotonic()
                     continue
 
         except Exception as e:
@@ -1578,7 +1626,7 @@ async def process_registration(flow_id: str):
     app_id = flow.get('application_id')
     if app_id:
         try:
-            app_res = supabase.table("applications").select("user_id").eq("id", app_id).single().execute()
+            app_res = await asyncio.to_thread(supabase.table("applications").select("user_id").eq("id", app_id).single().execute)
             user_id = app_res.data.get('user_id') if app_res.data else None
         except Exception as e:
             await log(f"⚠️ Failed to get user_id from application: {e}", flow_id)
@@ -1586,7 +1634,7 @@ async def process_registration(flow_id: str):
         job_id = flow.get('job_id')
         if job_id:
             try:
-                job_res = supabase.table("jobs").select("user_id").eq("id", job_id).single().execute()
+                job_res = await asyncio.to_thread(supabase.table("jobs").select("user_id").eq("id", job_id).single().execute)
                 user_id = job_res.data.get('user_id') if job_res.data else None
             except Exception:
                 pass
@@ -1691,9 +1739,9 @@ async def process_registration(flow_id: str):
             app_id = flow.get('application_id')
             if app_id:
                 try:
-                    supabase.table("applications").update({
+                    await asyncio.to_thread(supabase.table("applications").update({
                         "status": "sending"
-                    }).eq("id", app_id).eq("status", "manual_review").execute()
+                    }).eq("id", app_id).eq("status", "manual_review").execute)
                     await log(f"📬 Re-queued application {app_id[:8]}", flow_id)
                 except Exception as e:
                     await log(f"⚠️ Failed to re-queue application: {e}", flow_id)
@@ -1784,9 +1832,9 @@ async def process_registration(flow_id: str):
                             app_id = flow.get('application_id')
                             if app_id:
                                 try:
-                                    supabase.table("applications").update({
+                                    await asyncio.to_thread(supabase.table("applications").update({
                                         "status": "sending"
-                                    }).eq("id", app_id).eq("status", "manual_review").execute()
+                                    }).eq("id", app_id).eq("status", "manual_review").execute)
                                     await log(f"📬 Re-queued application {app_id[:8]}", flow_id)
                                 except Exception as e:
                                     await log(f"⚠️ Failed to re-queue application: {e}", flow_id)
@@ -1821,16 +1869,16 @@ async def process_registration(flow_id: str):
 
                 # Wait for password via Telegram (reuse pending_question mechanism)
                 try:
-                    supabase.table("registration_flows").update({
+                    await asyncio.to_thread(supabase.table("registration_flows").update({
                         "pending_question": "existing_password",
                         "status": "waiting_answer"
-                    }).eq("id", flow_id).execute()
+                    }).eq("id", flow_id).execute)
 
                     # Poll for answer (5 minutes)
                     for _ in range(60):
                         await asyncio.sleep(5)
-                        resp = supabase.table("registration_flows") \
-                            .select("qa_history").eq("id", flow_id).single().execute()
+                        resp = await asyncio.to_thread(supabase.table("registration_flows") \
+                            .select("qa_history").eq("id", flow_id).single().execute)
                         qa_history = resp.data.get("qa_history", []) if resp.data else []
                         for qa in reversed(qa_history):
                             if qa.get('question') == 'existing_password' and qa.get('answer'):
@@ -1843,9 +1891,9 @@ async def process_registration(flow_id: str):
                                 app_id = flow.get('application_id')
                                 if app_id:
                                     try:
-                                        supabase.table("applications").update({
+                                        await asyncio.to_thread(supabase.table("applications").update({
                                             "status": "sending"
-                                        }).eq("id", app_id).eq("status", "manual_review").execute()
+                                        }).eq("id", app_id).eq("status", "manual_review").execute)
                                         await log(f"📬 Re-queued application {app_id[:8]}", flow_id)
                                     except Exception as e:
                                         await log(f"⚠️ Failed to re-queue: {e}", flow_id)
@@ -1858,8 +1906,8 @@ async def process_registration(flow_id: str):
                                 )
                                 return
                         # Check if still waiting
-                        flow_resp = supabase.table("registration_flows") \
-                            .select("status").eq("id", flow_id).single().execute()
+                        flow_resp = await asyncio.to_thread(supabase.table("registration_flows") \
+                            .select("status").eq("id", flow_id).single().execute)
                         if flow_resp.data and flow_resp.data.get("status") != "waiting_answer":
                             break
 
@@ -1953,10 +2001,10 @@ async def check_and_register(url: str, job_id: str = None, application_id: str =
 async def process_pending_flows():
     """Process any pending registration flows."""
     try:
-        response = supabase.table("registration_flows") \
+        response = await asyncio.to_thread(supabase.table("registration_flows") \
             .select("*") \
             .in_("status", ["pending", "registering"]) \
-            .execute()
+            .execute)
 
         if response.data:
             for flow in response.data: